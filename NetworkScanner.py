@@ -7,22 +7,492 @@ import sys
 import platform
 import subprocess
 import socket
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import select
+import struct
+import errno
+import time
+import os
+import asyncio
+import argparse
+import queue
+import threading
+from contextlib import nullcontext, contextmanager
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from collections import deque
 from datetime import datetime
 import csv
+import json
+import io
+import bisect
+import itertools
 import ipaddress
+import re
+
+try:
+    import resource
+except ImportError:  # Windows has no RLIMIT_NOFILE to check or raise
+    resource = None
 
 PING_WORKERS = 100
 PORT_SCANNER_WORKERS = 200
 PING_TIMEOUT_SEC = 1
-CONNECT_TIMEOUT_SEC = 0.5
+CONNECT_TIMEOUT_SEC = 0.5  # starting timeout until a host or its subnet has RTT samples
+MIN_TIMEOUT_SEC = 0.05
+MAX_TIMEOUT_SEC = 3.0
+RATE_BURST = 10  # probes that may go out back to back after an idle period under --rate
+PROBE_RETRIES = 1  # extra attempts, with a doubled timeout, when a probe times out
+ASYNC_CONCURRENCY = 2000  # probes in flight at once for the asyncio engine (capped by the open file limit)
+FD_HEADROOM = 64  # file descriptors kept free for the event loop, output files, pings...
+LOCAL_BACKOFF_SEC = 0.01  # first wait after the scanner itself ran out of sockets
+LOCAL_BACKOFF_MAX_SEC = 2.0  # give up (and raise) once the wait would exceed this
+DISCOVERY_WINDOW = 4096  # discovery probes submitted but not yet answered, whatever the range size
+HOST_QUEUE_SIZE = 1000  # alive hosts buffered between the discovery and port scan stages
+PORTS_PER_HOST = 8  # ports of a single host probed at the same time
+FLUSH_INTERVAL_SEC = 2  # how often streamed result rows and the checkpoint hit the disk
+HOST_TTL_SEC = 15 * 60  # a live host's full port list is trusted this long before a full rescan
+SWEEP_TTL_SEC = 60 * 60  # addresses that did not answer a sweep are not re-probed for this long
+SHARDS_PER_PROCESS = 4  # smaller shards than processes keep the pool busy until the end
+THREAD_PROBE_LIMIT = 512  # connects in flight across all hosts for the thread engine
+METRICS_INTERVAL_SEC = 5  # how often in-flight/queue gauges are sampled and the Prometheus file rewritten
+BANNER_TIMEOUT_SEC = 1.0  # total time a banner read may take on a port that just connected
+BANNER_BYTES = 1024  # most of a banner we keep
+LATENCY_BUCKETS_SEC = [0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0]
 COMMON_PORTS = [21, 22, 23, 25, 53, 80, 110, 139, 143, 443, 445, 3389]
+DISCOVERY_PORTS = [80, 443, 22, 445, 3389]  # likely-open ports tried by the tcp discovery probe
+DISCOVERY_METHODS = ['ping', 'tcp', 'icmp']
+IS_WINDOWS = platform.system().lower() == 'windows'
+NEIGHBOR_TABLE = '/proc/net/arp'
+ATF_COM = 0x2  # neighbor entry is complete (has a hardware address)
+# A refused connection still proves something answered at that address.
+REFUSED_ERRNOS = {errno.ECONNREFUSED, 10061}  # 10061 = WSAECONNREFUSED
+# Out of descriptors or buffers on this machine: says nothing about the target, so back off and retry.
+LOCAL_ERRNOS = {errno.EMFILE, errno.ENFILE, errno.ENOBUFS}
+# A non-blocking connect that is under way; 10035 = WSAEWOULDBLOCK
+IN_PROGRESS_ERRNOS = {errno.EINPROGRESS, errno.EWOULDBLOCK, 10035}
 
-def ping_host(ip:str)->bool:
+class RttEstimator:
     """
-    Ping a host to check if it's alive.
+    Smoothed RTT and RTT variance, updated like TCP's retransmission timer (RFC 6298).
+    """
+    __slots__ = ('srtt', 'rttvar')
+
+    def __init__(self):
+        self.srtt = None
+        self.rttvar = None
+
+    def observe(self, sample:float):
+        if self.srtt is None:
+            self.srtt = sample
+            self.rttvar = sample / 2
+        else:
+            self.rttvar = 0.75 * self.rttvar + 0.25 * abs(self.srtt - sample)
+            self.srtt = 0.875 * self.srtt + 0.125 * sample
+
+    def timeout(self)->float:
+        return self.srtt + 4 * self.rttvar
+
+def subnet_key(ip:str)->str:
+    """
+    RTT samples are pooled per /24 so hosts without samples yet borrow their neighbours' estimate.
+    """
+    return ip.rsplit('.', 1)[0]
+
+class RttTracker:
+    """
+    Per-host and per-subnet RTT estimates shared by every probe of a scan. Connect
+    and refusal times are fed in as samples; timeouts come back as srtt + 4 * rttvar
+    (host first, then subnet, then CONNECT_TIMEOUT_SEC) clamped to the min/max.
+    """
+    def __init__(self, retries:int=PROBE_RETRIES, default_timeout:float=CONNECT_TIMEOUT_SEC):
+        self.retries = retries
+        self.default_timeout = default_timeout
+        self.hosts = {}
+        self.subnets = {}
+        self.lock = threading.Lock()
+
+    def observe(self, ip:str, sample:float):
+        with self.lock:
+            self.hosts.setdefault(ip, RttEstimator()).observe(sample)
+            self.subnets.setdefault(subnet_key(ip), RttEstimator()).observe(sample)
+
+    def timeout(self, ip:str)->float:
+        estimator = self.hosts.get(ip) or self.subnets.get(subnet_key(ip))
+        if estimator is None:
+            return self.default_timeout
+        return min(MAX_TIMEOUT_SEC, max(MIN_TIMEOUT_SEC, estimator.timeout()))
+
+def probe_timing(rtt, ip:str):
+    """
+    (first timeout, number of attempts) for a probe, fixed when no tracker is given.
+    """
+    if rtt is None:
+        return CONNECT_TIMEOUT_SEC, 1
+    return rtt.timeout(ip), 1 + rtt.retries
+
+class ScanStopped(Exception):
+    """
+    Raised in a probe that is skipped because the scan is being stopped (Ctrl-C).
+    """
+
+class ProbeScheduler:
     """
-    if platform.system().lower() == 'windows':
+    Paces every probe of a scan (pings, connects, echo requests) to `rate` per second
+    overall and `subnet_rate` per destination /24. Waiting probes are queued per host
+    and send slots are handed out round-robin across hosts, so one host's ports are
+    interleaved with everyone else's instead of going out back to back.
+    """
+    def __init__(self, rate:float, subnet_rate:float=None, burst:int=RATE_BURST):
+        self.interval = 1.0 / rate
+        self.subnet_interval = 1.0 / subnet_rate if subnet_rate else 0.0
+        self.burst = burst
+        self.waiting = {}  # ip -> deque of wake-up callbacks, oldest first
+        self.order = deque()  # hosts with waiting probes, in round-robin order
+        self.subnet_next = {}  # /24 -> earliest time its next probe may go out
+        self.cond = threading.Condition()
+        self.dispatcher = None
+        self.stopped = False
+
+    def enqueue(self, ip:str, wake):
+        with self.cond:
+            if self.stopped:
+                wake()
+                return
+            if ip not in self.waiting:
+                self.waiting[ip] = deque()
+                self.order.append(ip)
+            self.waiting[ip].append(wake)
+            if self.dispatcher is None:
+                self.dispatcher = threading.Thread(target=self.dispatch, daemon=True)
+                self.dispatcher.start()
+            self.cond.notify()
+
+    def acquire(self, ip:str):
+        """
+        Block the calling thread until the probe to `ip` may be sent.
+        """
+        ready = threading.Event()
+        self.enqueue(ip, ready.set)
+        ready.wait()
+        if self.stopped:
+            raise ScanStopped(ip)
+
+    async def async_acquire(self, ip:str):
+        loop = asyncio.get_running_loop()
+        ready = loop.create_future()
+
+        def wake():
+            loop.call_soon_threadsafe(lambda: ready.done() or ready.set_result(None))
+
+        self.enqueue(ip, wake)
+        await ready
+        if self.stopped:
+            raise ScanStopped(ip)
+
+    def stop(self):
+        """
+        Release every waiting probe (each raises ScanStopped instead of being sent),
+        and any probe that asks from now on, and let the dispatcher thread exit.
+        """
+        with self.cond:
+            self.stopped = True
+            for queued in self.waiting.values():
+                for wake in queued:
+                    wake()
+            self.waiting.clear()
+            self.order.clear()
+            self.cond.notify_all()
+
+    def next_eligible(self, now:float):
+        """
+        Rotate through waiting hosts and take the first whose subnet has a free slot.
+        Returns (ip, None) or (None, seconds until a subnet slot frees up).
+        """
+        soonest = None
+        for _ in range(len(self.order)):
+            ip = self.order.popleft()
+            key = subnet_key(ip)
+            earliest = now - self.burst * self.subnet_interval  # an idle subnet may burst
+            ready_at = self.subnet_next.get(key, earliest)
+            if ready_at <= now:
+                self.subnet_next[key] = max(ready_at, earliest) + self.subnet_interval
+                return ip, None
+            self.order.append(ip)
+            soonest = ready_at if soonest is None else min(soonest, ready_at)
+        return None, soonest - now
+
+    def dispatch(self):
+        next_slot = time.monotonic()
+        with self.cond:
+            while not self.stopped:
+                if not self.order:
+                    self.cond.wait()
+                    continue
+                now = time.monotonic()
+                if now < next_slot:
+                    self.cond.wait(next_slot - now)
+                    continue
+                ip, delay = self.next_eligible(now)
+                if ip is None:
+                    self.cond.wait(delay)
+                    continue
+                queued = self.waiting[ip]
+                queued.popleft()()
+                if queued:
+                    self.order.append(ip)
+                else:
+                    del self.waiting[ip]
+                next_slot = max(next_slot, now - self.burst * self.interval) + self.interval
+                if len(self.subnet_next) > 4 * DISCOVERY_WINDOW:
+                    self.subnet_next = {key: at for key, at in self.subnet_next.items() if at > now}
+
+def rate_limiter(rate:float=None, subnet_rate:float=None):
+    """
+    ProbeScheduler for the given limits, or None when probes are not rate limited.
+    The scan passes it down to every probe, like rtt, and stop()s it when done.
+    """
+    return ProbeScheduler(rate or float('inf'), subnet_rate) if rate or subnet_rate else None
+
+def throttle(ip:str, scheduler=None):
+    if scheduler is not None:
+        start = time.monotonic()
+        scheduler.acquire(ip)
+        metrics.add_wait('throttle', time.monotonic() - start)
+
+async def async_throttle(ip:str, scheduler=None):
+    if scheduler is not None:
+        start = time.monotonic()
+        await scheduler.async_acquire(ip)
+        metrics.add_wait('throttle', time.monotonic() - start)
+
+# --- metrics ---
+# Probe latencies split by outcome, time spent waiting for the rate limiter and the
+# concurrency limit, per-phase wall time, and sampled in-flight/queue gauges, so a
+# slow scan shows whether it is waiting on timeouts, on scheduling or on I/O.
+
+class LatencyHistogram:
+    """
+    Counts per LATENCY_BUCKETS_SEC upper bound (the last slot is +Inf), plus sum and count.
+    """
+    __slots__ = ('counts', 'total', 'count')
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS_SEC) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds:float):
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS_SEC, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+
+    def quantile(self, fraction:float)->float:
+        """
+        Upper bound of the bucket holding the quantile (the largest finite bound for +Inf).
+        """
+        rank = fraction * self.count
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS_SEC, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return LATENCY_BUCKETS_SEC[-1]
+
+    def to_dict(self)->dict:
+        return {'count': self.count, 'sum_sec': self.total, 'counts': list(self.counts)}
+
+    @classmethod
+    def from_dict(cls, data:dict):
+        histogram = cls()
+        histogram.counts = list(data['counts'])
+        histogram.total = data['sum_sec']
+        histogram.count = data['count']
+        return histogram
+
+class ScanMetrics:
+    """
+    Instrumentation shared by every probe of a scan. Nothing is recorded until
+    start(); after that a sampler thread records the gauges every METRICS_INTERVAL_SEC
+    and, with a `prometheus_path`, rewrites that file in the text exposition format.
+    """
+    def __init__(self):
+        self.enabled = False
+        self.lock = threading.Lock()
+        self.started = time.monotonic()
+        self.phases = {}  # phase -> seconds of wall time
+        self.waits = {}  # 'throttle' / 'limit' -> seconds probes spent waiting for a slot
+        self.latency = {}  # (probe, outcome) -> LatencyHistogram
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.queues = {}  # name -> callable returning the current depth
+        self.samples = []  # {'t', 'in_flight', 'queues'} every METRICS_INTERVAL_SEC
+        self.prometheus_path = None
+        self.stopped = threading.Event()
+        self.sampler = None
+
+    def start(self, prometheus_path:str=None):
+        self.enabled = True
+        self.started = time.monotonic()
+        self.prometheus_path = prometheus_path
+        self.sampler = threading.Thread(target=self.sample_periodically, daemon=True)
+        self.sampler.start()
+
+    def stop(self):
+        if self.sampler is not None:
+            self.stopped.set()
+            self.sampler.join()
+            self.sample()
+
+    def observe(self, probe:str, outcome:str, seconds:float):
+        if not self.enabled:
+            return
+        with self.lock:
+            histogram = self.latency.get((probe, outcome))
+            if histogram is None:
+                histogram = self.latency[(probe, outcome)] = LatencyHistogram()
+            histogram.observe(seconds)
+
+    def add_wait(self, reason:str, seconds:float):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.waits[reason] = self.waits.get(reason, 0.0) + seconds
+
+    def probe_started(self):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def probe_finished(self):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.in_flight -= 1
+
+    @contextmanager
+    def phase(self, name:str):
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            if self.enabled:
+                with self.lock:
+                    self.phases[name] = self.phases.get(name, 0.0) + time.monotonic() - start
+
+    def watch_queue(self, name:str, depth):
+        """
+        Sample `depth()` as the size of queue `name`; a later call with the same name replaces it.
+        """
+        if self.enabled:
+            self.queues[name] = depth
+
+    def sample(self):
+        queues = {name: depth() for name, depth in list(self.queues.items())}
+        with self.lock:
+            self.samples.append({'t': round(time.monotonic() - self.started, 3),
+                                 'in_flight': self.in_flight, 'queues': queues})
+
+    def sample_periodically(self):
+        while not self.stopped.wait(METRICS_INTERVAL_SEC):
+            self.sample()
+            if self.prometheus_path:
+                self.write_prometheus(self.prometheus_path)
+
+    def snapshot(self)->dict:
+        with self.lock:
+            return {
+                'elapsed_sec': time.monotonic() - self.started,
+                'phases_sec': dict(self.phases),
+                'wait_sec': dict(self.waits),
+                'latency': [{'probe': probe, 'outcome': outcome, **histogram.to_dict()}
+                            for (probe, outcome), histogram in sorted(self.latency.items())],
+                'peak_in_flight': self.peak_in_flight,
+                'samples': list(self.samples),
+            }
+
+    def merge(self, snapshot:dict):
+        """
+        Add the counters of another process's snapshot (e.g. a finished shard) to ours.
+        """
+        with self.lock:
+            for name, seconds in snapshot['phases_sec'].items():
+                self.phases[name] = self.phases.get(name, 0.0) + seconds
+            for reason, seconds in snapshot['wait_sec'].items():
+                self.waits[reason] = self.waits.get(reason, 0.0) + seconds
+            for entry in snapshot['latency']:
+                key = (entry['probe'], entry['outcome'])
+                other = LatencyHistogram.from_dict(entry)
+                histogram = self.latency.setdefault(key, LatencyHistogram())
+                histogram.counts = [a + b for a, b in zip(histogram.counts, other.counts)]
+                histogram.total += other.total
+                histogram.count += other.count
+            self.peak_in_flight = max(self.peak_in_flight, snapshot['peak_in_flight'])
+
+    def report(self)->dict:
+        """
+        The snapshot plus outcome counts and p50/p99 estimates, as written to --metrics.
+        """
+        report = self.snapshot()
+        outcomes = {}
+        for entry in report['latency']:
+            outcomes.setdefault(entry['probe'], {})[entry['outcome']] = entry['count']
+            histogram = LatencyHistogram.from_dict(entry)
+            entry['p50_ms'] = histogram.quantile(0.50) * 1000
+            entry['p99_ms'] = histogram.quantile(0.99) * 1000
+            entry['buckets_sec'] = LATENCY_BUCKETS_SEC + ['+Inf']
+        report['outcomes'] = outcomes
+        return report
+
+    def write_json(self, path:str):
+        with open(path, 'w') as f:
+            json.dump(self.report(), f, indent=2)
+
+    def write_prometheus(self, path:str):
+        report = self.snapshot()
+        lines = ['# HELP netscan_probe_latency_seconds Probe latency by probe type and outcome.',
+                 '# TYPE netscan_probe_latency_seconds histogram']
+        for entry in report['latency']:
+            labels = f'probe="{entry["probe"]}",outcome="{entry["outcome"]}"'
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS_SEC + ['+Inf'], entry['counts']):
+                cumulative += count
+                lines.append(f'netscan_probe_latency_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'netscan_probe_latency_seconds_sum{{{labels}}} {entry["sum_sec"]}')
+            lines.append(f'netscan_probe_latency_seconds_count{{{labels}}} {entry["count"]}')
+        lines += ['# HELP netscan_wait_seconds_total Time probes spent waiting for a send slot.',
+                  '# TYPE netscan_wait_seconds_total counter']
+        lines += [f'netscan_wait_seconds_total{{reason="{reason}"}} {seconds}'
+                  for reason, seconds in sorted(report['wait_sec'].items())]
+        lines += ['# HELP netscan_phase_seconds Wall time spent in each scan phase.',
+                  '# TYPE netscan_phase_seconds gauge']
+        lines += [f'netscan_phase_seconds{{phase="{name}"}} {seconds}'
+                  for name, seconds in sorted(report['phases_sec'].items())]
+        last = report['samples'][-1] if report['samples'] else {'in_flight': 0, 'queues': {}}
+        lines += ['# HELP netscan_probes_in_flight Probes currently waiting for an answer.',
+                  '# TYPE netscan_probes_in_flight gauge',
+                  f'netscan_probes_in_flight {last["in_flight"]}',
+                  '# TYPE netscan_probes_in_flight_peak gauge',
+                  f'netscan_probes_in_flight_peak {report["peak_in_flight"]}',
+                  '# HELP netscan_queue_depth Items waiting in each work queue.',
+                  '# TYPE netscan_queue_depth gauge']
+        lines += [f'netscan_queue_depth{{queue="{name}"}} {depth}'
+                  for name, depth in sorted(last['queues'].items())]
+        lines += ['# TYPE netscan_elapsed_seconds gauge', f'netscan_elapsed_seconds {report["elapsed_sec"]}']
+        # Written aside and renamed, so a scraper never reads half a file.
+        temp_path = path + '.tmp'
+        with open(temp_path, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+        os.replace(temp_path, path)
+
+# Every probe reports here. scan_shard() swaps in a fresh one for each shard, since pool processes are reused.
+metrics = ScanMetrics()
+
+def ping_command(ip:str)->list:
+    """
+    Build the platform specific ping command for a single echo request.
+    """
+    if IS_WINDOWS:
         param = '-n'
         timeout_param = '-w'
         timeout = str(PING_TIMEOUT_SEC * 1000)  # milliseconds
@@ -30,79 +500,1596 @@ def ping_host(ip:str)->bool:
         param = '-c'
         timeout_param = '-W'
         timeout = str(PING_TIMEOUT_SEC)  # seconds
-    command = ['ping', param, '1', timeout_param, timeout, str(ip)]
+    return ['ping', param, '1', timeout_param, timeout, str(ip)]
+
+def ping_host(ip:str, scheduler=None)->bool:
+    """
+    Ping a host to check if it's alive.
+    """
+    command = ping_command(ip)
+    throttle(ip, scheduler)
+    metrics.probe_started()
+    start = time.monotonic()
     try:
         output = subprocess.check_output(command, stderr=subprocess.DEVNULL)
+        metrics.observe('ping', 'alive', time.monotonic() - start)
         return True
     except subprocess.CalledProcessError:
+        metrics.observe('ping', 'dead', time.monotonic() - start)
         return False
-    
-def scan_ports(ip:str, ports:list)->list:
-    open_ports = []
-    for port in ports:
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
-            sock.settimeout(CONNECT_TIMEOUT_SEC)
-            result = sock.connect_ex((ip, port))
-            if result == 0:
-                open_ports.append(port)
-    return open_ports   
-
-def discover_devices(subnet:str)->list:
+    finally:
+        metrics.probe_finished()
+
+def wait_local_backoff(error:OSError, backoff:float)->float:
+    """
+    Thread engine's local_backoff(): sleep out a local shortage of sockets and return
+    the next, doubled wait, or raise `error` past LOCAL_BACKOFF_MAX_SEC.
+    """
+    if backoff > LOCAL_BACKOFF_MAX_SEC:
+        raise error
+    metrics.observe('local_backoff', errno.errorcode.get(error.errno, str(error.errno)), backoff)
+    time.sleep(backoff)
+    return backoff * 2
+
+def start_connect(ip:str, port:int, scheduler=None):
+    """
+    Non-blocking connect to one port: (socket, connect_ex result, start time). Out of
+    sockets or buffers locally, it backs off and tries again instead of failing the port.
+    """
+    backoff = LOCAL_BACKOFF_SEC
+    while True:
+        try:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        except OSError as e:
+            if e.errno not in LOCAL_ERRNOS:
+                raise
+            backoff = wait_local_backoff(e, backoff)
+            continue
+        sock.setblocking(False)
+        throttle(ip, scheduler)
+        start = time.monotonic()
+        result = sock.connect_ex((ip, port))
+        if result not in LOCAL_ERRNOS:
+            return sock, result, start
+        sock.close()
+        backoff = wait_local_backoff(OSError(result, os.strerror(result)), backoff)
+
+def tcp_probe_once(ip:str, ports:list, timeout:float, rtt=None, scheduler=None):
+    """
+    One round of non-blocking connects to `ports`. True if any connected or was
+    refused, False if all failed outright, None if some were still pending at the timeout.
+    """
+    socks = []
+    pending = []
+    started = {}
+    try:
+        for port in ports:
+            sock, result, started[sock] = start_connect(ip, port, scheduler)
+            socks.append(sock)
+            if result == 0 or result in REFUSED_ERRNOS:
+                return True
+            if result in IN_PROGRESS_ERRNOS:
+                pending.append(sock)
+            # anything else (unreachable, no route...) failed this port outright
+        deadline = time.monotonic() + timeout
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            _, writable, failed = select.select([], pending, pending, remaining)
+            for sock in set(writable) | set(failed):
+                error = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                if error == 0 or error in REFUSED_ERRNOS:
+                    if rtt is not None:
+                        rtt.observe(ip, time.monotonic() - started[sock])
+                    return True
+                pending.remove(sock)
+        return False
+    finally:
+        for sock in socks:
+            sock.close()
+
+def tcp_probe_host(ip:str, ports:list=DISCOVERY_PORTS, rtt=None, scheduler=None)->bool:
+    """
+    In-process discovery: start non-blocking connects to a few likely ports and
+    report the host alive as soon as any of them completes or is refused.
+    """
+    timeout, attempts = probe_timing(rtt, ip)
+    for _ in range(attempts):
+        metrics.probe_started()
+        start = time.monotonic()
+        try:
+            state = tcp_probe_once(ip, ports, timeout, rtt, scheduler)
+        finally:
+            metrics.probe_finished()
+        outcome = {True: 'alive', False: 'dead', None: 'timeout'}[state]
+        metrics.observe('tcp_discovery', outcome, time.monotonic() - start)
+        if state is not None:
+            return state
+        timeout = min(timeout * 2, MAX_TIMEOUT_SEC)
+    return False
+
+def icmp_checksum(data:bytes)->int:
+    if len(data) % 2:
+        data += b'\0'
+    total = sum(struct.unpack(f'!{len(data) // 2}H', data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+def icmp_echo_request(seq:int)->bytes:
+    # The kernel replaces the identifier on datagram ICMP sockets, so 0 is fine here.
+    header = struct.pack('!BBHHH', 8, 0, 0, 0, seq)
+    payload = b'netscan'
+    checksum = icmp_checksum(header + payload)
+    return struct.pack('!BBHHH', 8, 0, checksum, 0, seq) + payload
+
+def open_icmp_socket():
+    """
+    Unprivileged ICMP socket (Linux/macOS). Raises OSError when the OS does not
+    allow it, e.g. Linux with net.ipv4.ping_group_range excluding our group.
+    Linux hands back bare ICMP messages, macOS the IPv4 packet around them.
+    """
+    return socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_ICMP)
+
+def icmp_seq(ip:str)->int:
+    # Derived from the address so no per-host table is needed to match replies.
+    return int(ipaddress.IPv4Address(ip)) & 0xFFFF
+
+def iter_icmp_replies(hosts, timeout:float=PING_TIMEOUT_SEC, rtt=None, window:int=DISCOVERY_WINDOW,
+                      on_dead=None, known_alive=frozenset(), scheduler=None):
+    """
+    Send echo requests from a single socket, keeping at most `window` hosts
+    outstanding, and yield each address as soon as its reply arrives. Hosts
+    silent for `timeout` seconds are resent rtt.retries times (with a tracker)
+    and then given up on (reported to `on_dead`), so memory stays flat however
+    many hosts are fed in. Hosts in `known_alive` are yielded without a request.
+    """
+    attempts = 1 + (rtt.retries if rtt is not None else 0)
+    pending = {}  # ip -> send time of its outstanding request
+    timers = deque()  # (deadline, ip, resends left), in send order so deadlines are sorted
+    targets = iter(hosts)
+    exhausted = False
+
+    def drain(sock, wait):
+        replies = []
+        while True:
+            readable, _, _ = select.select([sock], [], [], wait)
+            if not readable:
+                return replies
+            wait = 0
+            try:
+                packet, (src, _) = sock.recvfrom(1024)
+            except BlockingIOError:
+                return replies
+            if packet and packet[0] >> 4 == 4:
+                # macOS (BSD) delivers the IPv4 header in front of the ICMP message; Linux does not
+                packet = packet[(packet[0] & 0x0F) * 4:]
+            if len(packet) < 8:
+                continue
+            icmp_type, _, _, _, seq = struct.unpack('!BBHHH', packet[:8])
+            if icmp_type == 0 and src in pending and icmp_seq(src) == seq:
+                sent = pending.pop(src)
+                metrics.observe('icmp', 'alive', time.monotonic() - sent)
+                if rtt is not None:
+                    rtt.observe(src, time.monotonic() - sent)
+                replies.append(src)
+
+    def send(sock, ip, resends_left):
+        throttle(ip, scheduler)
+        while True:
+            try:
+                sock.sendto(icmp_echo_request(icmp_seq(ip)), (ip, 0))
+                break
+            except BlockingIOError:
+                select.select([], [sock], [], timeout)
+            except OSError as e:
+                print(f"Error pinging {ip}: {e}")
+                pending.pop(ip, None)
+                if on_dead is not None:
+                    on_dead(ip)
+                return
+        now = time.monotonic()
+        pending[ip] = now
+        timers.append((now + timeout, ip, resends_left))
+
+    with open_icmp_socket() as sock:
+        sock.setblocking(False)
+        while True:
+            while not exhausted and len(timers) < window:
+                ip = next(targets, None)
+                if ip is None:
+                    exhausted = True
+                elif ip in known_alive:
+                    yield ip
+                else:
+                    send(sock, str(ip), attempts - 1)
+                    yield from drain(sock, 0)
+            now = time.monotonic()
+            while timers and timers[0][0] <= now:
+                _, ip, resends_left = timers.popleft()
+                if ip not in pending:
+                    continue
+                if resends_left > 0:
+                    send(sock, ip, resends_left - 1)
+                else:
+                    metrics.observe('icmp', 'timeout', now - pending.pop(ip))
+                    if on_dead is not None:
+                        on_dead(ip)
+            if not timers:
+                if exhausted:
+                    return
+                continue
+            yield from drain(sock, max(0.0, timers[0][0] - time.monotonic()))
+
+def icmp_available()->bool:
+    try:
+        open_icmp_socket().close()
+        return True
+    except OSError:
+        return False
+
+def resolve_discovery_method(method:str)->str:
+    """
+    Fall back to the ping subprocess when the ICMP socket is not permitted.
+    """
+    if method == 'icmp' and not icmp_available():
+        print("ICMP datagram sockets are not permitted here; falling back to ping.")
+        return 'ping'
+    return method
+
+def parse_port_spec(spec:str)->list:
+    """
+    Turn a port spec like "1-1024,3389,8000-8100" into a sorted list of unique ports.
+    """
+    ports = set()
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        low, sep, high = part.partition('-')
+        try:
+            first = int(low)
+            last = int(high) if sep else first
+        except ValueError:
+            raise ValueError(f"invalid port range: {part!r}") from None
+        if not 1 <= first <= last <= 65535:
+            raise ValueError(f"port range out of bounds (1-65535): {part!r}")
+        ports.update(range(first, last + 1))
+    if not ports:
+        raise ValueError("empty port spec")
+    return sorted(ports)
+
+class PortBitmap:
+    """
+    Set of TCP ports kept as one bit per port, grown only up to the highest port
+    set (8 KiB at most). Iterates in ascending order, like the old open_ports lists.
+    """
+    __slots__ = ('bits', 'services')
+
+    def __init__(self, ports=()):
+        self.bits = bytearray()
+        self.services = None  # port -> (service, banner line) when banners were grabbed
+        for port in ports:
+            self.add(port)
+
+    def add(self, port:int):
+        index = port >> 3
+        if index >= len(self.bits):
+            self.bits.extend(bytes(index + 1 - len(self.bits)))
+        self.bits[index] |= 1 << (port & 7)
+
+    def __contains__(self, port:int)->bool:
+        index = port >> 3
+        return index < len(self.bits) and bool(self.bits[index] >> (port & 7) & 1)
+
+    def __iter__(self):
+        for index, byte in enumerate(self.bits):
+            if byte:
+                for bit in range(8):
+                    if byte >> bit & 1:
+                        yield (index << 3) | bit
+
+    def __len__(self)->int:
+        return sum(bin(byte).count('1') for byte in self.bits)
+
+    def __bool__(self)->bool:
+        return any(self.bits)
+
+    def __eq__(self, other)->bool:
+        # Equal to another bitmap or to the sorted list of the same ports, like the old open_ports lists
+        if isinstance(other, PortBitmap):
+            return self.bits.rstrip(b'\0') == other.bits.rstrip(b'\0')
+        if isinstance(other, (list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self)->str:
+        return repr(list(self))
+
+# --- banner grabbing ---
+# With --banners the connection that proved a port open is used once more: we read
+# what the service says (or send a protocol probe for client-first protocols) and
+# match it against SERVICE_SIGNATURES, so no second connection is ever made.
+
+HTTP_PROBE = b'HEAD / HTTP/1.0\r\n\r\n'
+# Sent right after connecting; every other port waits for the server to speak first.
+SERVICE_PROBES = {
+    53: b'\x00\x1e\x12\x34\x01\x00\x00\x01\x00\x00\x00\x00\x00\x00'  # TCP DNS query, id 0x1234:
+        b'\x07version\x04bind\x00\x00\x10\x00\x03',  # version.bind TXT CH
+    80: HTTP_PROBE,
+    443: HTTP_PROBE,  # a TLS server answers plain text with an alert
+    445: b'\x00\x00\x00\x2f\xffSMB\x72' + bytes(27) + b'\x0c\x00\x02NT LM 0.12\x00',  # SMB1 negotiate
+    3389: b'\x03\x00\x00\x13\x0e\xe0\x00\x00\x00\x00\x00\x01\x00\x08\x00\x03\x00\x00\x00',  # X.224 connect
+    8080: HTTP_PROBE,
+}
+# Sent when a server-first port has said nothing for half of BANNER_TIMEOUT_SEC.
+IDLE_PROBE = b'\r\n\r\n'
+# (service, pattern, group holding product/version details or None), first match wins.
+SERVICE_SIGNATURES = [
+    ('ssh', re.compile(rb'^SSH-[\d.]+-([^\r\n]+)'), 1),
+    ('http', re.compile(rb'^HTTP/\d\.\d \d{3}(?:.*?\r?\nServer: *([^\r\n]+))?', re.S | re.I), 1),
+    ('ftp', re.compile(rb'^220[ -]([^\r\n]*ftp[^\r\n]*)', re.I), 1),
+    ('smtp', re.compile(rb'^220[ -]([^\r\n]*(?:smtp|mail)[^\r\n]*)', re.I), 1),
+    ('pop3', re.compile(rb'^\+OK ?([^\r\n]*)'), 1),
+    ('imap', re.compile(rb'^\* (?:OK|PREAUTH) ?([^\r\n]*)'), 1),
+    ('tls', re.compile(rb'^[\x15\x16]\x03[\x00-\x04]'), None),
+    ('rdp', re.compile(rb'^\x03\x00\x00.\x0e\xd0', re.S), None),
+    ('dns', re.compile(rb'^..\x12\x34[\x80-\xff]', re.S), None),
+    ('smb', re.compile(rb'^\x00...[\xff\xfe]SMB', re.S), None),
+    ('telnet', re.compile(rb'^\xff[\xfb-\xfe]'), None),
+]
+# Guess for ports whose reply matched nothing (or that stayed silent).
+PORT_SERVICES = {21: 'ftp', 22: 'ssh', 23: 'telnet', 25: 'smtp', 53: 'dns', 80: 'http', 110: 'pop3',
+                 139: 'netbios-ssn', 143: 'imap', 443: 'https', 445: 'smb', 3389: 'rdp', 8080: 'http'}
+
+def banner_complete(data:bytes)->bool:
+    # One text line or any binary reply is enough to fingerprint.
+    return b'\n' in data or not (0x20 <= data[0] <= 0x7e)
+
+def fingerprint(port:int, banner:bytes)->tuple:
+    """
+    (service, first banner line) for what a port sent back. Unmatched replies fall
+    back to the port's usual service with a '?', silent ones too.
+    """
+    line = banner.split(b'\n', 1)[0].strip().decode('ascii', 'replace') if banner[:1].isascii() else ''
+    for service, pattern, group in SERVICE_SIGNATURES:
+        match = pattern.match(banner)
+        if match:
+            detail = match.group(group) if group is not None else None
+            if detail:
+                return f"{service} {detail.strip().decode('ascii', 'replace')}", line
+            return service, line
+    return PORT_SERVICES.get(port, 'unknown') + '?', line
+
+def grab_banner(sock, port:int)->bytes:
+    """
+    Read up to BANNER_BYTES from a socket that has just connected, within BANNER_TIMEOUT_SEC.
+    """
+    deadline = time.monotonic() + BANNER_TIMEOUT_SEC
+    probe = SERVICE_PROBES.get(port)
+    data = b''
+    try:
+        if probe is not None:
+            sock.sendall(probe)
+        while len(data) < BANNER_BYTES and not (data and banner_complete(data)):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            waiting_for_greeting = probe is None and not data
+            sock.settimeout(min(remaining, BANNER_TIMEOUT_SEC / 2) if waiting_for_greeting else remaining)
+            try:
+                chunk = sock.recv(BANNER_BYTES - len(data))
+            except socket.timeout:
+                if not waiting_for_greeting:
+                    break
+                probe = IDLE_PROBE
+                sock.sendall(probe)
+                continue
+            if not chunk:
+                break
+            data += chunk
+    except OSError:
+        pass
+    return data
+
+async def async_grab_banner(reader, writer, port:int)->bytes:
+    """
+    grab_banner for an asyncio stream pair.
+    """
+    deadline = time.monotonic() + BANNER_TIMEOUT_SEC
+    probe = SERVICE_PROBES.get(port)
+    data = b''
+    try:
+        if probe is not None:
+            writer.write(probe)
+            await writer.drain()
+        while len(data) < BANNER_BYTES and not (data and banner_complete(data)):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            waiting_for_greeting = probe is None and not data
+            wait = min(remaining, BANNER_TIMEOUT_SEC / 2) if waiting_for_greeting else remaining
+            try:
+                chunk = await asyncio.wait_for(reader.read(BANNER_BYTES - len(data)), wait)
+            except asyncio.TimeoutError:
+                if not waiting_for_greeting:
+                    break
+                probe = IDLE_PROBE
+                writer.write(probe)
+                await writer.drain()
+                continue
+            if not chunk:
+                break
+            data += chunk
+    except OSError:
+        pass
+    return data
+
+def record_service(services:dict, port:int, banner:bytes, elapsed:float):
+    services[port] = fingerprint(port, banner)
+    metrics.observe('banner', 'identified' if not services[port][0].endswith('?') else 'unidentified', elapsed)
+
+def probe_port(ip:str, port:int, limit=None, rtt=None, services=None, scheduler=None)->bool:
+    """
+    TCP connect to one port; `limit` is an optional semaphore shared by every scanning thread.
+    A refusal or error is a definite answer; a timeout is retried with a doubled timeout.
+    With a `services` dict, an open port's banner is read on the same connection and
+    its fingerprint stored under the port.
+    """
+    timeout, attempts = probe_timing(rtt, ip)
+    waited = time.monotonic()
+    with limit if limit is not None else nullcontext():
+        metrics.add_wait('limit', time.monotonic() - waited)
+        for _ in range(attempts):
+            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+                sock.settimeout(timeout)
+                throttle(ip, scheduler)
+                metrics.probe_started()
+                start = time.monotonic()
+                try:
+                    sock.connect((ip, port))
+                    state = 'open'
+                except socket.timeout:
+                    state = 'timeout'
+                except ConnectionRefusedError:
+                    state = 'refused'
+                except OSError:
+                    state = 'error'
+                finally:
+                    metrics.probe_finished()
+                elapsed = time.monotonic() - start
+                metrics.observe('connect', state, elapsed)
+                if state == 'timeout':
+                    timeout = min(timeout * 2, MAX_TIMEOUT_SEC)
+                    continue
+                if rtt is not None and state != 'error':
+                    rtt.observe(ip, elapsed)
+                if state == 'open' and services is not None:
+                    start = time.monotonic()
+                    record_service(services, port, grab_banner(sock, port), time.monotonic() - start)
+                return state == 'open'
+    return False
+
+def port_pool(concurrency:int=THREAD_PROBE_LIMIT, per_host:int=PORTS_PER_HOST)->ThreadPoolExecutor:
+    """
+    One pool for the port slices of every host a scan probes (see scan_ports). More
+    threads than `concurrency` would only wait on the connect semaphore.
+    """
+    return ThreadPoolExecutor(max_workers=max(1, min(concurrency, PORT_SCANNER_WORKERS * per_host)),
+                              thread_name_prefix='port-slice')
+
+def scan_ports(ip:str, ports:list, per_host:int=PORTS_PER_HOST, limit=None, rtt=None, pool=None,
+               banners:bool=False, stop=None, scheduler=None)->PortBitmap:
+    """
+    Probe up to `per_host` ports of the host at once, so a filtered host costs
+    len(ports) / per_host timeouts instead of one timeout per port. The slices run on
+    `pool`, a port_pool() shared by all hosts of the scan; without one (a single
+    host) a pool is made for this call. With `banners` open ports are fingerprinted.
+    Once the `stop` event is set the remaining ports are skipped and ScanStopped raised.
+    """
+    workers = max(1, min(per_host, len(ports)))
+    services = {} if banners else None
+
+    def scan_slice(slice_ports):
+        found = []
+        for port in slice_ports:
+            if stop is not None and stop.is_set():
+                raise ScanStopped(ip)
+            if probe_port(ip, port, limit, rtt, services, scheduler):
+                found.append(port)
+        return found
+
+    if workers == 1:
+        open_ports = PortBitmap(scan_slice(ports))
+        open_ports.services = services
+        return open_ports
+
+    slices = [ports[i::workers] for i in range(workers)]
+    open_ports = PortBitmap()
+    with nullcontext(pool) if pool is not None else ThreadPoolExecutor(max_workers=workers) as executor:
+        # The calling thread takes the first slice itself instead of idling until the pool is done.
+        futures = [executor.submit(scan_slice, slice_ports) for slice_ports in slices[1:]]
+        for port in scan_slice(slices[0]):
+            open_ports.add(port)
+        for future in futures:
+            for port in future.result():
+                open_ports.add(port)
+    open_ports.services = services
+    return open_ports
+
+def merge_intervals(intervals)->list:
+    """
+    Sort inclusive (first, last) integer intervals and merge overlapping or adjacent ones.
+    """
+    merged = []
+    for first, last in sorted(intervals):
+        if merged and first <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], last))
+        else:
+            merged.append((first, last))
+    return merged
+
+def subtract_intervals(intervals:list, excluded:list)->list:
+    """
+    Remove the merged `excluded` intervals from the merged `intervals`.
+    """
+    result = []
+    excluded = merge_intervals(excluded)
+    index = 0
+    for first, last in intervals:
+        while index < len(excluded) and excluded[index][1] < first:
+            index += 1
+        cursor = first
+        probe = index
+        while probe < len(excluded) and excluded[probe][0] <= last:
+            ex_first, ex_last = excluded[probe]
+            if ex_first > cursor:
+                result.append((cursor, ex_first - 1))
+            cursor = max(cursor, ex_last + 1)
+            probe += 1
+        if cursor <= last:
+            result.append((cursor, last))
+    return result
+
+def build_target_ranges(subnets:list, excludes:list=())->list:
+    """
+    Usable host ranges of every subnet, minus the excluded networks/addresses,
+    as sorted non-overlapping integer intervals so no address is probed twice.
+    """
+    included = [usable_range(subnet) for subnet in subnets]
+    excluded = []
+    for exclude in excludes:
+        network = ipaddress.IPv4Network(exclude, strict=False)
+        excluded.append((int(network.network_address), int(network.broadcast_address)))
+    return subtract_intervals(merge_intervals(included), excluded)
+
+def iter_range_hosts(ranges:list):
+    """
+    Lazily yield the addresses of integer intervals as strings.
+    """
+    for first, last in ranges:
+        for value in range(first, last + 1):
+            yield str(ipaddress.IPv4Address(value))
+
+def range_size(ranges:list)->int:
+    return sum(last - first + 1 for first, last in ranges)
+
+def read_neighbor_table(path:str=NEIGHBOR_TABLE)->set:
+    """
+    Addresses the kernel already has a resolved link-layer entry for, read straight
+    from /proc/net/arp (Linux). Returns an empty set where the file does not exist.
+    """
+    try:
+        with open(path) as f:
+            lines = f.readlines()[1:]  # skip the header row
+    except OSError:
+        return set()
+    neighbors = set()
+    for line in lines:
+        fields = line.split()
+        # IP address, HW type, Flags, HW address, Mask, Device
+        if len(fields) >= 4 and int(fields[2], 16) & ATF_COM and fields[3] != '00:00:00:00:00:00':
+            neighbors.add(fields[0])
+    return neighbors
+
+def iter_targets(targets):
+    """
+    Addresses to probe: a subnet string expands to its usable hosts, anything else
+    is taken as an iterable of addresses (e.g. iter_range_hosts over merged ranges).
+    """
+    if isinstance(targets, str):
+        return iter_range_hosts([usable_range(targets)])
+    return (str(ip) for ip in targets)
+
+def iter_alive_hosts(targets, method:str='ping', rtt=None, on_dead=None, known_alive=frozenset(),
+                     on_error=None, scheduler=None):
+    """
+    Yield alive hosts of the subnet in the order they answer, so callers can start
+    working on them before the sweep is over. Addresses found dead are passed to
+    `on_dead`, so callers can account for every target. Targets in `known_alive`
+    (e.g. from the neighbor table) are yielded straight away without a probe.
+    """
+    method = resolve_discovery_method(method)
+    if method == 'icmp':
+        yield from iter_icmp_replies(iter_targets(targets), rtt=rtt, on_dead=on_dead, known_alive=known_alive,
+                                     scheduler=scheduler)
+        return
+    if method == 'tcp':
+        probe = lambda ip: tcp_probe_host(ip, DISCOVERY_PORTS, rtt, scheduler)
+    else:
+        probe = lambda ip: ping_host(ip, scheduler)
+    remaining = iter_targets(targets)
+    in_flight = {}
+    metrics.watch_queue('discovery', in_flight.__len__)
+    executor = ThreadPoolExecutor(max_workers=PING_WORKERS)
+    try:
+        while True:
+            # Only DISCOVERY_WINDOW futures exist at a time, so a /8 costs no more memory than a /24.
+            for ip in remaining:
+                if ip in known_alive:
+                    yield ip
+                    continue
+                in_flight[executor.submit(probe, ip)] = ip
+                if len(in_flight) >= DISCOVERY_WINDOW:
+                    break
+            if not in_flight:
+                return
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                ip = in_flight.pop(future)
+                try:
+                    is_alive = future.result()
+                except Exception as e:
+                    print(f"Error pinging {ip}: {e}")
+                    if on_error is not None:
+                        on_error(ip)
+                    continue
+                if is_alive:
+                    yield ip
+                elif on_dead is not None:
+                    on_dead(ip)
+    finally:
+        # Interrupted or closed early: drop the probes not started yet instead of
+        # waiting for up to DISCOVERY_WINDOW of them (nothing is pending otherwise).
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def discover_devices(subnet:str, method:str='ping', rtt=None)->list:
     """
     Discover devices in the given subnet using ping sweep.
+    method: 'ping' (subprocess per host), 'tcp' (connect probe) or 'icmp' (one datagram socket).
+    """
+    return list(iter_alive_hosts(subnet, method, rtt))
+
+def pipeline_scan(targets, ports:list, method:str='ping', per_host:int=PORTS_PER_HOST,
+                  concurrency:int=THREAD_PROBE_LIMIT, rtt=None, on_result=None, on_dead=None,
+                  known_alive=frozenset(), banners:bool=False, on_error=None, scheduler=None)->list:
+    """
+    Discovery and port scan as two concurrent stages: every host that answers goes
+    onto a bounded queue and port-scan workers pick it up straight away instead of
+    waiting for the whole sweep to finish.
+    With `on_result(ip, open_ports)` results are streamed to it instead of collected.
+    With `banners` open ports are fingerprinted too. Addresses whose probe raised
+    have neither a result nor a verdict; they are passed to `on_error(ip)`.
+    `scheduler` (see rate_limiter) paces every probe; it is stopped on Ctrl-C.
+    """
+    hosts_queue = queue.Queue(maxsize=HOST_QUEUE_SIZE)
+    limit = threading.BoundedSemaphore(concurrency)
+    pool = port_pool(concurrency, per_host)
+    stop = threading.Event()  # set on Ctrl-C: hosts not finished yet are dropped, not scanned
+    results = []
+
+    def port_worker():
+        while True:
+            ip = hosts_queue.get()
+            if ip is None:
+                return
+            try:
+                open_ports = scan_ports(ip, ports, per_host, limit, rtt, pool, banners, stop, scheduler)
+                if on_result is not None:
+                    on_result(ip, open_ports)
+                else:
+                    results.append((ip, open_ports))
+                print(f"{ip}: Open ports: {open_ports}")
+            except Exception as e:
+                if stop.is_set():
+                    continue  # neither written nor checkpointed, so --resume scans it again
+                print(f"Error scanning ports on {ip}: {e}")
+                if on_error is not None:
+                    on_error(ip)
+
+    workers = [threading.Thread(target=port_worker, daemon=True) for _ in range(PORT_SCANNER_WORKERS)]
+    for worker in workers:
+        worker.start()
+    metrics.watch_queue('hosts', hosts_queue.qsize)
+    alive_count = 0
+    alive_hosts = iter_alive_hosts(targets, method, rtt, on_dead, known_alive, on_error, scheduler)
+    try:
+        with metrics.phase('discovery'):
+            for ip in alive_hosts:
+                alive_count += 1
+                hosts_queue.put(ip)  # blocks while the scanners are HOST_QUEUE_SIZE hosts behind
+        with metrics.phase('port_scan_drain'):
+            for _ in workers:
+                hosts_queue.put(None)
+            for worker in workers:
+                worker.join()
+    except BaseException:
+        # Ctrl-C: stop discovery, forget the queued hosts and cut the running scans
+        # short, instead of finishing up to HOST_QUEUE_SIZE hosts first.
+        stop.set()
+        if scheduler is not None:
+            scheduler.stop()
+        alive_hosts.close()
+        while True:
+            try:
+                hosts_queue.get_nowait()
+            except queue.Empty:
+                break
+        for _ in workers:
+            hosts_queue.put(None)
+        for worker in workers:
+            worker.join()
+        raise
+    finally:
+        pool.shutdown(cancel_futures=True)
+    print(f"Discovered {alive_count} alive hosts.")
+    return results
+
+# --- asyncio engine ---
+# Same ping sweep + TCP connect scan, but every probe is a coroutine instead of a
+# thread, so thousands of probes can be in flight while a semaphore caps the total.
+
+async def local_backoff(error:OSError, backoff:float)->float:
+    """
+    Wait out a local shortage of sockets or file descriptors (other probes finishing
+    frees them) and return the next, doubled wait. Raises `error` once waiting longer
+    than LOCAL_BACKOFF_MAX_SEC, so the probe fails loudly instead of counting as a
+    closed port or a dead host.
+    """
+    if backoff > LOCAL_BACKOFF_MAX_SEC:
+        raise error
+    metrics.observe('local_backoff', errno.errorcode.get(error.errno, str(error.errno)), backoff)
+    await asyncio.sleep(backoff)
+    return backoff * 2
+
+def async_concurrency_limit(requested:int)->int:
+    """
+    Probes the asyncio engine can keep in flight: every one holds a socket, so the
+    soft open file limit is raised towards the hard limit when it is too low, and the
+    concurrency capped below whatever it ends up at.
+    """
+    if resource is None:
+        return requested
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    wanted = requested + FD_HEADROOM
+    if soft != resource.RLIM_INFINITY and soft < wanted:
+        target = wanted if hard == resource.RLIM_INFINITY else min(wanted, hard)
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+            soft = target
+        except (ValueError, OSError):
+            pass
+    if soft == resource.RLIM_INFINITY or soft >= wanted:
+        return requested
+    limit = max(1, soft - FD_HEADROOM)
+    print(f"Open file limit is {soft}; running {limit} async probes at once instead of {requested}.")
+    return limit
+
+async def async_ping_host(ip:str, limit:asyncio.Semaphore, scheduler=None)->bool:
+    """
+    Ping a host without blocking the event loop.
+    """
+    async with limit:
+        backoff = LOCAL_BACKOFF_SEC
+        while True:
+            await async_throttle(ip, scheduler)
+            metrics.probe_started()
+            start = time.monotonic()
+            try:
+                process = await asyncio.create_subprocess_exec(
+                    *ping_command(ip), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                alive = await process.wait() == 0
+            except OSError as e:
+                if e.errno not in LOCAL_ERRNOS:
+                    alive = False
+                else:
+                    backoff = await local_backoff(e, backoff)
+                    continue
+            finally:
+                metrics.probe_finished()
+            metrics.observe('ping', 'alive' if alive else 'dead', time.monotonic() - start)
+            return alive
+
+async def async_connect_state(ip:str, port:int, timeout:float, rtt=None, services=None, probe:str=None,
+                              scheduler=None)->str:
+    """
+    One async connect attempt: 'open', 'refused', 'error' (unreachable etc.) or 'timeout'.
+    With a `services` dict an open port's banner is fingerprinted before closing, like
+    probe_port. `probe` labels the handshake time in the metrics (None records nothing).
+    """
+    backoff = LOCAL_BACKOFF_SEC
+    while True:
+        await async_throttle(ip, scheduler)
+        metrics.probe_started()
+        start = time.monotonic()
+        try:
+            reader, writer = await asyncio.wait_for(asyncio.open_connection(ip, port), timeout)
+            state = 'open'
+        except asyncio.TimeoutError:
+            state = 'timeout'
+        except ConnectionRefusedError:
+            state = 'refused'
+        except OSError as e:
+            if e.errno not in LOCAL_ERRNOS:
+                state = 'error'
+            else:
+                state = None
+                local_error = e
+        finally:
+            metrics.probe_finished()
+        if state is not None:
+            break
+        backoff = await local_backoff(local_error, backoff)
+    elapsed = time.monotonic() - start
+    if probe is not None:
+        metrics.observe(probe, state, elapsed)
+    if rtt is not None and state in ('open', 'refused'):
+        rtt.observe(ip, elapsed)
+    if state != 'open':
+        return state
+    if services is not None:
+        start = time.monotonic()
+        record_service(services, port, await async_grab_banner(reader, writer, port), time.monotonic() - start)
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except OSError:
+        pass
+    return 'open'
+
+async def async_tcp_probe_host(ip:str, limit:asyncio.Semaphore, rtt=None, scheduler=None)->bool:
+    """
+    Async version of tcp_probe_host: alive if any discovery port connects or refuses.
+    """
+    timeout, attempts = probe_timing(rtt, ip)
+
+    async def attempt(port):
+        async with limit:
+            return await async_connect_state(ip, port, timeout, rtt, scheduler=scheduler)
+
+    for _ in range(attempts):
+        start = time.monotonic()
+        states = await asyncio.gather(*(attempt(port) for port in DISCOVERY_PORTS))
+        # A refusal proves the host is up just as well as a completed handshake.
+        if 'open' in states or 'refused' in states:
+            outcome = 'alive'
+        else:
+            outcome = 'timeout' if 'timeout' in states else 'dead'
+        metrics.observe('tcp_discovery', outcome, time.monotonic() - start)
+        if outcome != 'timeout':
+            return outcome == 'alive'
+        timeout = min(timeout * 2, MAX_TIMEOUT_SEC)
+    return False
+
+async def async_probe_port(ip:str, port:int, limit:asyncio.Semaphore, rtt=None, services=None,
+                           scheduler=None)->bool:
+    """
+    TCP connect to one port; True when the handshake completes before the timeout.
+    Timeouts are retried with a doubled timeout, like probe_port.
+    """
+    timeout, attempts = probe_timing(rtt, ip)
+    waited = time.monotonic()
+    async with limit:
+        metrics.add_wait('limit', time.monotonic() - waited)
+        for _ in range(attempts):
+            state = await async_connect_state(ip, port, timeout, rtt, services, 'connect', scheduler)
+            if state != 'timeout':
+                return state == 'open'
+            timeout = min(timeout * 2, MAX_TIMEOUT_SEC)
+    return False
+
+async def async_scan_ports(ip:str, ports:list, limit:asyncio.Semaphore,
+                           per_host:int=PORTS_PER_HOST, rtt=None, banners:bool=False, stop=None,
+                           scheduler=None)->PortBitmap:
+    """
+    Probe the host's ports with `per_host` workers pulling from one shared iterator,
+    so even a 1-65535 scan only has `per_host` coroutines alive per host. Once the
+    `stop` event is set the remaining ports are skipped and ScanStopped raised.
+    """
+    open_ports = PortBitmap()
+    open_ports.services = {} if banners else None
+    remaining = iter(ports)
+
+    async def worker():
+        for port in remaining:
+            if stop is not None and stop.is_set():
+                raise ScanStopped(ip)
+            if await async_probe_port(ip, port, limit, rtt, open_ports.services, scheduler):
+                open_ports.add(port)
+
+    await asyncio.gather(*(worker() for _ in range(max(1, min(per_host, len(ports))))))
+    return open_ports
+
+async def async_iter_alive_hosts(targets, limit:asyncio.Semaphore, method:str='ping', rtt=None,
+                                 on_dead=None, known_alive=frozenset(), on_error=None, scheduler=None):
+    """
+    Async generator of alive hosts in the order they answer.
+    """
+    method = resolve_discovery_method(method)
+    if method == 'icmp':
+        # The sweep multiplexes every host over one blocking select loop, so run it
+        # on a helper thread and hand replies back to the event loop as they arrive.
+        loop = asyncio.get_running_loop()
+        replies = asyncio.Queue()
+        def sweep():
+            try:
+                for ip in iter_icmp_replies(iter_targets(targets), rtt=rtt, on_dead=on_dead,
+                                            known_alive=known_alive, scheduler=scheduler):
+                    loop.call_soon_threadsafe(replies.put_nowait, ip)
+            finally:
+                loop.call_soon_threadsafe(replies.put_nowait, None)
+        sweeper = loop.run_in_executor(None, sweep)
+        while (ip := await replies.get()) is not None:
+            yield ip
+        await sweeper
+        return
+    async def probe_one(ip):
+        try:
+            if method == 'tcp':
+                return ip, await async_tcp_probe_host(ip, limit, rtt, scheduler)
+            return ip, await async_ping_host(ip, limit, scheduler)
+        except Exception as e:
+            print(f"Error pinging {ip}: {e}")
+            return ip, None
+
+    remaining = iter_targets(targets)
+    in_flight = set()
+    metrics.watch_queue('discovery', lambda: len(in_flight))
+    while True:
+        for ip in remaining:
+            if ip in known_alive:
+                yield ip
+                continue
+            in_flight.add(asyncio.ensure_future(probe_one(ip)))
+            if len(in_flight) >= DISCOVERY_WINDOW:
+                break
+        if not in_flight:
+            return
+        done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            ip, is_alive = task.result()
+            if is_alive:
+                yield ip
+            elif is_alive is None:
+                if on_error is not None:
+                    on_error(ip)
+            elif on_dead is not None:
+                on_dead(ip)
+
+async def async_scan(targets, ports:list, concurrency:int, discovery:str='ping',
+                     per_host:int=PORTS_PER_HOST, rtt=None, on_result=None, on_dead=None,
+                     known_alive=frozenset(), banners:bool=False, on_error=None, scheduler=None)->list:
+    """
+    Pipelined discovery -> port scan: hosts are queued as soon as they answer and
+    PORT_SCANNER_WORKERS consumer tasks scan them while the sweep continues.
+    Addresses whose probe raised are passed to `on_error(ip)`, as in pipeline_scan.
+    """
+    limit = asyncio.Semaphore(concurrency)
+    hosts_queue = asyncio.Queue(maxsize=HOST_QUEUE_SIZE)
+    # Set on Ctrl-C. Cancelling alone is not enough: on Python 3.11 asyncio.wait_for()
+    # can swallow a cancel, and that port worker would carry on through the queue.
+    stop = asyncio.Event()
+    results = []
+
+    async def port_worker():
+        while (ip := await hosts_queue.get()) is not None and not stop.is_set():
+            try:
+                open_ports = await async_scan_ports(ip, ports, limit, per_host, rtt, banners, stop, scheduler)
+                if on_result is not None:
+                    on_result(ip, open_ports)
+                else:
+                    results.append((ip, open_ports))
+                print(f"{ip}: Open ports: {open_ports}")
+            except Exception as e:
+                if stop.is_set():
+                    return  # neither written nor checkpointed, so --resume scans it again
+                print(f"Error scanning ports on {ip}: {e}")
+                if on_error is not None:
+                    on_error(ip)
+
+    print("Discovering devices and scanning ports...")  # Debug print
+    workers = [asyncio.create_task(port_worker()) for _ in range(PORT_SCANNER_WORKERS)]
+    metrics.watch_queue('hosts', hosts_queue.qsize)
+    alive_count = 0
+    try:
+        with metrics.phase('discovery'):
+            async for ip in async_iter_alive_hosts(targets, limit, discovery, rtt, on_dead, known_alive, on_error,
+                                                   scheduler):
+                alive_count += 1
+                await hosts_queue.put(ip)
+        with metrics.phase('port_scan_drain'):
+            for _ in workers:
+                await hosts_queue.put(None)
+            await asyncio.gather(*workers)
+    except BaseException:
+        # Ctrl-C cancels the scan: cancel the port scans too rather than letting them
+        # work through the queued hosts; unfinished hosts are never recorded.
+        stop.set()
+        if scheduler is not None:
+            scheduler.stop()
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        raise
+    print(f"Discovered {alive_count} alive hosts.")
+    return results
+
+def run_async_scan(targets, ports:list=COMMON_PORTS, concurrency:int=ASYNC_CONCURRENCY,
+                   discovery:str='ping', per_host:int=PORTS_PER_HOST, rtt=None,
+                   on_result=None, on_dead=None, known_alive=frozenset(), banners:bool=False,
+                   on_error=None, scheduler=None)->list:
+    """
+    Run discovery and port scan on the asyncio engine; returns (ip, open_ports) pairs.
+    """
+    concurrency = async_concurrency_limit(concurrency)
+    return asyncio.run(async_scan(targets, ports, concurrency, discovery, per_host, rtt,
+                                  on_result, on_dead, known_alive, banners, on_error, scheduler))
+
+# --- multi-process sharding ---
+# Each worker process scans one CIDR chunk with its own engine (and its own
+# RttTracker), so large ranges scale with cores instead of one interpreter.
+
+def usable_range(subnet:str)->tuple:
+    """
+    First and last address of subnet.hosts() as integers.
+    """
+    network = ipaddress.IPv4Network(subnet)
+    first, last = int(network.network_address), int(network.broadcast_address)
+    if network.num_addresses > 2:
+        first, last = first + 1, last - 1
+    return first, last
+
+def shard_ranges(ranges:list, shards:int)->list:
     """
-    alive_hosts = []
-    with ThreadPoolExecutor(max_workers=PING_WORKERS) as executor:
-        futures = {executor.submit(ping_host, str(ip)): str(ip) for ip in ipaddress.ip_network(subnet).hosts()}
+    Cut the target intervals along aligned CIDR blocks (a power of two sized so that
+    there are about `shards` of them) and return the pieces as inclusive integer ranges.
+    """
+    block = 1
+    while block * shards < range_size(ranges):
+        block *= 2
+    pieces = []
+    for first, last in ranges:
+        while first <= last:
+            block_end = (first // block + 1) * block - 1
+            pieces.append((first, min(last, block_end)))
+            first = block_end + 1
+    return pieces
+
+def scan_shard(first:int, last:int, options:dict)->tuple:
+    """
+    Worker process entry point: scan addresses first..last with the chosen engine.
+    Returns the (ip, open_ports) pairs, the addresses whose probe failed and, with
+    options['metrics'], the shard's metrics snapshot.
+    """
+    global metrics
+    targets = (str(ipaddress.IPv4Address(value)) for value in range(first, last + 1))
+    rtt = None if options['fixed_timeouts'] else RttTracker(options['retries'])
+    known_alive = read_neighbor_table() if options['neighbors'] else frozenset()
+    # Pool processes are reused, so every shard starts from fresh counters.
+    metrics = ScanMetrics()
+    metrics.enabled = options['metrics']
+    failed = []
+    scheduler = rate_limiter(options['rate'], options['subnet_rate'])
+    try:
+        if options['engine'] == 'async':
+            results = run_async_scan(targets, options['ports'], options['concurrency'] or ASYNC_CONCURRENCY,
+                                     options['discovery'], options['per_host'], rtt, known_alive=known_alive,
+                                     banners=options['banners'], on_error=failed.append, scheduler=scheduler)
+        else:
+            results = pipeline_scan(targets, options['ports'], options['discovery'], options['per_host'],
+                                    options['concurrency'] or THREAD_PROBE_LIMIT, rtt, known_alive=known_alive,
+                                    banners=options['banners'], on_error=failed.append, scheduler=scheduler)
+    finally:
+        if scheduler is not None:
+            scheduler.stop()
+    return results, failed, metrics.snapshot() if metrics.enabled else None
+
+def sharded_scan(ranges:list, processes:int, options:dict, on_result=None, on_shard_done=None,
+                 on_error=None)->list:
+    """
+    Spread CIDR chunks of the target ranges over a process pool and merge their
+    (ip, open_ports) results. `options` holds the per-process engine settings.
+    With `on_result` each finished shard's rows are streamed to it, followed by
+    on_shard_done(first, last) if every address of the shard got an answer.
+    Failed addresses, or "first-last" for a shard that crashed, go to `on_error`.
+    """
+    shards = shard_ranges(ranges, processes * SHARDS_PER_PROCESS)
+    print(f"Scanning {len(shards)} shards on {processes} processes...")  # Debug print
+    results = []
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        futures = {executor.submit(scan_shard, first, last, options): (first, last) for first, last in shards}
         for future in as_completed(futures):
-            ip = futures[future]
+            first, last = futures[future]
             try:
-                if future.result():
-                    alive_hosts.append(ip)
+                shard_results, shard_failed, shard_metrics = future.result()
             except Exception as e:
-                print(f"Error pinging {ip}: {e}")
-    return alive_hosts
+                shard = f"{ipaddress.IPv4Address(first)}-{ipaddress.IPv4Address(last)}"
+                print(f"Error scanning shard {shard}: {e}")
+                if on_error is not None:
+                    on_error(shard)
+                continue
+            if shard_metrics is not None:
+                metrics.merge(shard_metrics)
+            if on_result is None:
+                results.extend(shard_results)
+            else:
+                for ip, open_ports in shard_results:
+                    on_result(ip, open_ports)
+            if on_error is not None:
+                for ip in shard_failed:
+                    on_error(ip)
+            if on_shard_done is not None and not shard_failed:
+                on_shard_done(first, last)
+    return results
 
-def main():
-    print("Script started")  # Debug print
-    if len(sys.argv) != 2:
-        print("No subnet argument provided. Using default: 127.0.0.1/32")
-        subnet = "127.0.0.1/32"
+# --- streaming output and checkpoints ---
+# Rows are appended as hosts finish and flushed every FLUSH_INTERVAL_SEC; the
+# checkpoint records which addresses are finished so --resume can skip them.
+
+class Checkpoint:
+    """
+    Tracks finished target addresses as (first, last) intervals. An address is
+    finished once it was found dead or had its row written. Discovery keeps thousands
+    of addresses in flight, so they finish out of order: each one is recorded on its
+    own and snapshot() merges neighbours back into ranges.
+    """
+    def __init__(self, path:str, done=()):
+        self.path = path
+        self.done = list(done)
+        self.lock = threading.Lock()
+
+    def finish(self, ip:str):
+        value = int(ipaddress.IPv4Address(ip))
+        with self.lock:
+            self.done.append((value, value))
+
+    def finish_range(self, first:int, last:int):
+        with self.lock:
+            self.done.append((first, last))
+
+    def snapshot(self)->list:
+        with self.lock:
+            self.done = merge_intervals(self.done)
+            return list(self.done)
+
+    def save(self, done:list):
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump({'done': done}, f)
+        os.replace(temp_path, self.path)
+
+    @staticmethod
+    def load(path:str)->list:
+        try:
+            with open(path) as f:
+                return [tuple(interval) for interval in json.load(f)['done']]
+        except FileNotFoundError:
+            return []
+
+def complete_lines(path:str)->list:
+    """
+    Lines of a results file, without a last line an interrupted write left unfinished.
+    """
+    if not os.path.exists(path):
+        return []
+    with open(path, newline='') as f:
+        lines = f.read().splitlines(keepends=True)
+    if lines and not lines[-1].endswith('\n'):
+        lines.pop()
+    return lines
+
+def written_hosts(path:str, fmt:str='csv')->list:
+    """
+    (value, value) intervals of the addresses that already have a row in a results
+    file. Rows can reach the disk before the checkpoint that covers them, so --resume
+    skips these too instead of probing the hosts again and writing their rows twice.
+    """
+    lines = complete_lines(path)
+    if fmt == 'jsonl':
+        ips = (json.loads(line)['ip'] for line in lines if line.strip())
     else:
-        subnet = sys.argv[1]
-    print(f"Starting network scan on subnet: {subnet}")
-    start_time = datetime.now()
-    
-    print("Discovering devices...")  # Debug print
-    alive_hosts = discover_devices(subnet)
-    print(f"Discovered {len(alive_hosts)} alive hosts.")
-    
-    results = []
-    print("Scanning ports...")  # Debug print
-    with ThreadPoolExecutor(max_workers=PORT_SCANNER_WORKERS) as executor:
-        futures = {executor.submit(scan_ports, ip, COMMON_PORTS): ip for ip in alive_hosts}
+        ips = (row['IP Address'] for row in csv.DictReader(lines))
+    written = []
+    for ip in ips:
+        try:
+            value = int(ipaddress.IPv4Address(ip))
+        except ValueError:
+            continue
+        written.append((value, value))
+    return written
+
+def drop_partial_line(path:str):
+    """
+    Cut off an unfinished last line so appended rows start on a line of their own.
+    """
+    with open(path, 'rb+') as f:
+        position = f.seek(0, os.SEEK_END)
+        while position > 0:
+            size = min(4096, position)
+            f.seek(position - size)
+            newline = f.read(size).rfind(b'\n')
+            if newline >= 0:
+                f.truncate(position - size + newline + 1)
+                return
+            position -= size
+        f.truncate(0)
+
+class ResultWriter:
+    """
+    Appends one row per host as results arrive, as CSV ('IP Address' and
+    'Open Ports', plus a Services column with `services`) or JSON lines.
+    Rows are buffered and flushed on a timer; each flush also saves the checkpoint,
+    taken *before* the rows are written so it never claims a host whose row is
+    not on disk yet.
+    """
+    def __init__(self, path:str, fmt:str='csv', append:bool=False, checkpoint=None, services:bool=False):
+        self.fmt = fmt
+        self.checkpoint = checkpoint
+        self.services = services
+        if append and os.path.exists(path):
+            drop_partial_line(path)
+        has_rows = append and os.path.exists(path) and os.path.getsize(path) > 0
+        self.file = open(path, 'a' if append else 'w', newline='')
+        self.buffer = io.StringIO()
+        self.csv_writer = csv.writer(self.buffer)
+        if fmt == 'csv' and not has_rows:
+            self.csv_writer.writerow(['IP Address', 'Open Ports'] + (['Services'] if services else []))
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.flusher = threading.Thread(target=self.flush_periodically, daemon=True)
+        self.flusher.start()
+
+    def write(self, ip:str, open_ports):
+        services = getattr(open_ports, 'services', None) or {}
+        with self.lock:
+            if self.fmt == 'jsonl':
+                row = {'ip': ip, 'open_ports': list(open_ports)}
+                if self.services:
+                    row['services'] = {str(port): {'service': service, 'banner': banner}
+                                       for port, (service, banner) in sorted(services.items())}
+                self.buffer.write(json.dumps(row) + '\n')
+            else:
+                row = [ip, ', '.join(map(str, open_ports))]
+                if self.services:
+                    row.append('; '.join(f"{port}: {service}" for port, (service, _) in sorted(services.items())))
+                self.csv_writer.writerow(row)
+
+    def flush(self):
+        with self.lock:
+            done = self.checkpoint.snapshot() if self.checkpoint is not None else None
+            self.file.write(self.buffer.getvalue())
+            self.file.flush()
+            self.buffer.seek(0)
+            self.buffer.truncate()
+            if done is not None:
+                self.checkpoint.save(done)
+
+    def flush_periodically(self):
+        while not self.stopped.wait(FLUSH_INTERVAL_SEC):
+            self.flush()
+
+    def close(self):
+        self.stopped.set()
+        self.flusher.join()
+        self.flush()
+        self.file.close()
+
+# --- incremental rescans ---
+# Earlier results act as a cache: fresh live hosts are only re-checked on the
+# ports they had open, recently swept ranges are skipped, and everything else
+# (expired hosts, hosts that stopped answering, unswept addresses) gets a full probe.
+
+class ScanCache:
+    """
+    hosts: ip -> (open ports, time of the last full scan of the host)
+    sweeps: (first, last, time) address intervals a full discovery sweep covered
+    """
+    def __init__(self, hosts=None, sweeps=None):
+        self.hosts = hosts or {}
+        self.sweeps = sweeps or []
+
+    @classmethod
+    def load(cls, state_path:str, results_path:str=None):
+        """
+        Read the state file; without one, fall back to a previous results file
+        (CSV or JSONL), treating its rows as scanned when the file was written.
+        """
+        if os.path.exists(state_path):
+            with open(state_path) as f:
+                state = json.load(f)
+            hosts = {ip: (entry['open_ports'], entry['checked']) for ip, entry in state['hosts'].items()}
+            return cls(hosts, [tuple(sweep) for sweep in state['sweeps']])
+        hosts = {}
+        if results_path and os.path.exists(results_path):
+            checked = os.path.getmtime(results_path)
+            with open(results_path, newline='') as f:
+                if results_path.endswith('.jsonl'):
+                    rows = ((row['ip'], row['open_ports']) for row in map(json.loads, f) if row)
+                else:
+                    rows = ((row['IP Address'], [int(port) for port in row['Open Ports'].split(',') if port.strip()])
+                            for row in csv.DictReader(f))
+                for ip, open_ports in rows:
+                    hosts[ip] = (open_ports, checked)
+        return cls(hosts)
+
+    def save(self, path:str):
+        now = time.time()
+        state = {
+            'hosts': {ip: {'open_ports': list(ports), 'checked': checked} for ip, (ports, checked) in self.hosts.items()},
+            'sweeps': [sweep for sweep in self.sweeps if sweep[2] + SWEEP_TTL_SEC > now],
+        }
+        temp_path = path + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(temp_path, path)
+
+    def fresh_sweeps(self, now:float)->list:
+        return merge_intervals((first, last) for first, last, swept in self.sweeps if swept + SWEEP_TTL_SEC > now)
+
+def in_ranges(value:int, ranges:list, starts:list)->bool:
+    index = bisect.bisect_right(starts, value) - 1
+    return index >= 0 and value <= ranges[index][1]
+
+def incremental_scan(ranges:list, cache:ScanCache, ports:list, scan, method:str='ping',
+                     per_host:int=PORTS_PER_HOST, rtt=None, on_result=None, banners:bool=False,
+                     scheduler=None)->dict:
+    """
+    Rescan `ranges` using `cache` and update the cache in place. Returns the
+    cached and the current live hosts of the ranges as two {ip: open_ports} maps.
+    `scan(targets, on_result)` runs a full discovery + port scan (any engine)
+    on an iterable of addresses; `banners` applies to verifying the known hosts.
+    """
+    now = time.time()
+    starts = [first for first, _ in ranges]
+    known = {ip: entry for ip, entry in cache.hosts.items()
+             if in_ranges(int(ipaddress.IPv4Address(ip)), ranges, starts)}
+    fresh = {ip: entry for ip, entry in known.items() if entry[1] + HOST_TTL_SEC > now}
+    current = {}
+    lock = threading.Lock()
+
+    def record(ip, open_ports, checked):
+        with lock:
+            current[ip] = open_ports
+            cache.hosts[ip] = (list(open_ports), checked)
+        if on_result is not None:
+            on_result(ip, open_ports)
+
+    # 1. Verify fresh live hosts on the ports they had open (or with a discovery probe if none).
+    print(f"Verifying {len(fresh)} known hosts...")  # Debug print
+    with_ports = {ip: entry for ip, entry in fresh.items() if entry[0]}
+    limit = threading.BoundedSemaphore(THREAD_PROBE_LIMIT)
+    with ThreadPoolExecutor(max_workers=PORT_SCANNER_WORKERS) as executor, port_pool(THREAD_PROBE_LIMIT, per_host) as pool:
+        futures = {executor.submit(scan_ports, ip, ports_and_time[0], per_host, limit, rtt, pool, banners,
+                                   scheduler=scheduler): ip
+                   for ip, ports_and_time in with_ports.items()}
         for future in as_completed(futures):
             ip = futures[future]
             try:
                 open_ports = future.result()
-                results.append((ip, open_ports))
-                print(f"{ip}: Open ports: {open_ports}")
             except Exception as e:
-                print(f"Error scanning ports on {ip}: {e}")
+                print(f"Error verifying {ip}: {e}")
+                continue
+            if open_ports:
+                record(ip, open_ports, fresh[ip][1])
+    portless = [ip for ip, entry in fresh.items() if not entry[0]]
+    for ip in iter_alive_hosts(portless, method, rtt, scheduler=scheduler):
+        record(ip, PortBitmap(), fresh[ip][1])
+
+    # 2. Full probes: ranges not swept recently, plus known hosts that expired or failed verification.
+    unswept = subtract_intervals(ranges, cache.fresh_sweeps(now))
+    unswept_starts = [first for first, _ in unswept]
+    reprobe = [ip for ip in known if ip not in current
+               and not in_ranges(int(ipaddress.IPv4Address(ip)), unswept, unswept_starts)]
+    print(f"Full probes: {range_size(unswept)} unswept addresses, {len(reprobe)} known hosts to recheck.")
+    targets = itertools.chain((ip for ip in iter_range_hosts(unswept) if ip not in current), reprobe)
+    scan(targets, lambda ip, open_ports: record(ip, open_ports, now))
+
+    for ip in known:
+        if ip not in current:
+            del cache.hosts[ip]
+    cache.sweeps.extend((first, last, now) for first, last in unswept)
+    return {ip: ports for ip, (ports, _) in known.items()}, current
+
+def print_scan_diff(previous:dict, current:dict):
+    """
+    Print new hosts, vanished hosts and per-host port changes between two {ip: ports} maps.
+    """
+    by_address = lambda ip: int(ipaddress.IPv4Address(ip))
+    new_hosts = sorted(set(current) - set(previous), key=by_address)
+    vanished = sorted(set(previous) - set(current), key=by_address)
+    print(f"New hosts ({len(new_hosts)}): {', '.join(new_hosts) or '-'}")
+    print(f"Vanished hosts ({len(vanished)}): {', '.join(vanished) or '-'}")
+    for ip in sorted(set(previous) & set(current), key=by_address):
+        before, after = set(previous[ip]), set(current[ip])
+        if before != after:
+            print(f"{ip}: opened {sorted(after - before) or '-'}, closed {sorted(before - after) or '-'}")
+
+def port_spec_arg(spec:str)->list:
+    try:
+        return parse_port_spec(spec)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Ping sweep and TCP connect port scanner.")
+    parser.add_argument('subnets', nargs='*', metavar='subnet',
+                        help="one or more subnets to scan, e.g. 192.168.1.0/24 10.0.0.0/16")
+    parser.add_argument('--exclude', action='append', default=[],
+                        help="comma separated subnets or addresses to skip (repeatable)")
+    parser.add_argument('--engine', choices=['threads', 'async'], default='threads',
+                        help="thread pools (default) or the asyncio engine")
+    parser.add_argument('--concurrency', type=int, default=None,
+                        help=f"max probes in flight across all hosts (default: {THREAD_PROBE_LIMIT} "
+                             f"for threads, {ASYNC_CONCURRENCY} for async, capped by the open file limit)")
+    parser.add_argument('--ports', type=port_spec_arg, default=COMMON_PORTS,
+                        help="ports to scan, e.g. 1-1024,3389,8000-8100 (default: common ports)")
+    parser.add_argument('--per-host', type=int, default=PORTS_PER_HOST,
+                        help="ports of one host probed at the same time")
+    parser.add_argument('--discovery', choices=DISCOVERY_METHODS, default='ping',
+                        help="host discovery: ping subprocess (default), in-process tcp probe, "
+                             "or unprivileged icmp socket (falls back to ping if not permitted)")
+    parser.add_argument('--neighbors', action='store_true',
+                        help="treat hosts in the kernel neighbor table (/proc/net/arp) as alive "
+                             "and only probe the remaining addresses")
+    parser.add_argument('--rate', type=float, default=None,
+                        help="max probes per second across the whole scan (discovery and port scan)")
+    parser.add_argument('--subnet-rate', type=float, default=None,
+                        help="max probes per second to any one destination /24")
+    parser.add_argument('--retries', type=int, default=PROBE_RETRIES,
+                        help="extra attempts for probes that time out")
+    parser.add_argument('--fixed-timeouts', action='store_true',
+                        help=f"always wait CONNECT_TIMEOUT_SEC ({CONNECT_TIMEOUT_SEC}s) instead of "
+                             "adapting timeouts to the measured RTT")
+    parser.add_argument('--output', default='network_scan_results.csv',
+                        help="results file, written row by row while the scan runs")
+    parser.add_argument('--format', choices=['csv', 'jsonl'], default=None,
+                        help="output format (default: jsonl if --output ends in .jsonl, else csv)")
+    parser.add_argument('--checkpoint', default=None,
+                        help="checkpoint file of finished addresses (default: <output>.checkpoint)")
+    parser.add_argument('--resume', action='store_true',
+                        help="continue an interrupted scan: skip addresses in the checkpoint or already in the output and "
+                             "append to the existing output")
+    parser.add_argument('--processes', type=int, default=1,
+                        help="split the subnet into CIDR shards scanned by this many worker "
+                             "processes (--concurrency then applies per process)")
+    parser.add_argument('--incremental', action='store_true',
+                        help="reuse earlier results: verify known hosts on their open ports, skip "
+                             "recently swept ranges and print what changed")
+    parser.add_argument('--state', default='network_scan_state.json',
+                        help="state file for --incremental (falls back to the previous --output)")
+    parser.add_argument('--banners', action='store_true',
+                        help="read the banner of every open port on the connection that found it, "
+                             "send protocol probes where the client speaks first, and add the "
+                             "identified services to the output")
+    parser.add_argument('--metrics', default=None,
+                        help="write probe latency histograms, outcome counts, wait and phase "
+                             "timings and sampled in-flight/queue gauges as JSON when the scan ends")
+    parser.add_argument('--prometheus', default=None,
+                        help=f"keep this file updated (every {METRICS_INTERVAL_SEC}s) with the metrics "
+                             "in Prometheus text format while the scan runs")
+    args = parser.parse_args(argv)
+    if args.incremental and (args.resume or args.processes > 1):
+        parser.error("--incremental cannot be combined with --resume or --processes")
+    return args
+
+def main():
+    print("Script started")  # Debug print
+    args = parse_args()
+    if not args.subnets:
+        print("No subnet argument provided. Using default: 127.0.0.1/32")
+        subnets = ["127.0.0.1/32"]
+    else:
+        subnets = args.subnets
+    excludes = [item.strip() for value in args.exclude for item in value.split(',') if item.strip()]
+    try:
+        ranges = build_target_ranges(subnets, excludes)
+    except ValueError as e:
+        sys.exit(f"Invalid subnet: {e}")
+    output_format = args.format or ('jsonl' if args.output.endswith('.jsonl') else 'csv')
+    checkpoint_path = args.checkpoint or args.output + '.checkpoint'
+    done = []
+    if args.resume:
+        done = merge_intervals(Checkpoint.load(checkpoint_path) + written_hosts(args.output, output_format))
+        ranges = subtract_intervals(ranges, done)
+        print(f"Resuming: {range_size(merge_intervals(done))} addresses already finished.")
+    print(f"Starting network scan on subnet: {', '.join(subnets)} ({range_size(ranges)} addresses)")
+    start_time = datetime.now()
+    if args.metrics or args.prometheus:
+        metrics.start(args.prometheus)
+    rtt = None if args.fixed_timeouts else RttTracker(args.retries)
+    scheduler = rate_limiter(args.rate, args.subnet_rate)
+    # Load the cache before the writer truncates a previous results file it may come from.
+    cache = ScanCache.load(args.state, args.output) if args.incremental else None
+    checkpoint = None if args.incremental else Checkpoint(checkpoint_path, done)
+    writer = ResultWriter(args.output, output_format, append=args.resume, checkpoint=checkpoint,
+                          services=args.banners)
+
+    def record(ip, open_ports):
+        writer.write(ip, open_ports)
+        checkpoint.finish(ip)
+
+    # Addresses (or whole shards) whose probe raised: never written nor checkpointed.
+    failed = []
+
+    known_alive = frozenset()
+    if args.neighbors:
+        known_alive = read_neighbor_table()
+        print(f"Neighbor table lists {len(known_alive)} live hosts; they will not be pinged.")
+
+    def run_engine(targets, on_result, on_dead=None):
+        if args.engine == 'async':
+            run_async_scan(targets, args.ports, args.concurrency or ASYNC_CONCURRENCY,
+                           args.discovery, args.per_host, rtt, on_result, on_dead, known_alive, args.banners,
+                           failed.append, scheduler)
+        else:
+            print("Discovering devices and scanning ports...")  # Debug print
+            pipeline_scan(targets, args.ports, args.discovery, args.per_host,
+                          args.concurrency or THREAD_PROBE_LIMIT, rtt, on_result, on_dead, known_alive,
+                          args.banners, failed.append, scheduler)
+
+    completed = False
+    try:
+        if args.incremental:
+            previous, current = incremental_scan(ranges, cache, args.ports, run_engine, args.discovery,
+                                                 args.per_host, rtt, writer.write, args.banners, scheduler)
+            cache.save(args.state)
+            print_scan_diff(previous, current)
+        elif args.processes > 1:
+            options = {'engine': args.engine, 'ports': args.ports, 'discovery': args.discovery,
+                       'per_host': args.per_host, 'concurrency': args.concurrency,
+                       'retries': args.retries, 'fixed_timeouts': args.fixed_timeouts,
+                       'neighbors': args.neighbors, 'metrics': metrics.enabled, 'banners': args.banners,
+                       # every process gets an equal share of the rate limits
+                       'rate': args.rate and args.rate / args.processes,
+                       'subnet_rate': args.subnet_rate and args.subnet_rate / args.processes}
+            sharded_scan(ranges, args.processes, options, writer.write, checkpoint.finish_range, failed.append)
+        else:
+            run_engine(iter_range_hosts(ranges), record, checkpoint.finish)
+        completed = True
+    except KeyboardInterrupt:
+        if checkpoint is not None:
+            print(f"Scan interrupted; run again with --resume to continue from {checkpoint_path}")
+        else:
+            print(f"Scan interrupted; {args.state} was not updated.")
+    finally:
+        if scheduler is not None:
+            scheduler.stop()
+        with metrics.phase('write'):
+            writer.close()
     
     end_time = datetime.now()
     duration = end_time - start_time
-    print(f"Scan completed in {duration}.")
-    
-    print("Writing results to CSV...")  # Debug print
-    with open('network_scan_results.csv', 'w', newline='') as csvfile:
-        fieldnames = ['IP Address', 'Open Ports']
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-        for ip, ports in results:
-            writer.writerow({'IP Address': ip, 'Open Ports': ', '.join(map(str, ports))})
+    if not completed:
+        print(f"Scan stopped after {duration}.")
+    elif failed:
+        print(f"Scan finished in {duration}, but {len(failed)} targets failed (first: {failed[0]}).")
+        if checkpoint is not None:
+            print(f"Kept {checkpoint_path}; run again with --resume to retry them.")
+    else:
+        print(f"Scan completed in {duration}.")
+    # An --incremental run keeps no checkpoint; one on disk belongs to another, interrupted scan.
+    if completed and not failed and checkpoint is not None and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
     
-    print("Results saved to network_scan_results.csv")
+    print(f"Results saved to {args.output}")
+    if metrics.enabled:
+        metrics.stop()
+        if args.prometheus:
+            metrics.write_prometheus(args.prometheus)
+        if args.metrics:
+            metrics.write_json(args.metrics)
+            print(f"Metrics saved to {args.metrics}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,158 @@
+"""
+Headless batch mode for the Calculator's arithmetic: reads one expression per line
+from a file or stdin and writes one result per line, without Tk.
+
+Lines are read in chunks; inside a chunk expressions with the same template (the
+same operators and parentheses, only the numbers differ, e.g. "1+2*3" and "4+5*6")
+are evaluated together as NumPy column vectors by calculator_engine.run. Results come
+out in input order and are identical to calculator_engine.evaluate; rows NumPy
+could get wrong (huge integers, division by zero, overflow) are redone one by one.
+Without NumPy every line is evaluated one by one.
+
+Usage: python calculator_batch.py expressions.txt -o results.txt
+       generate_expressions | python calculator_batch.py --echo
+"""
+
+import argparse
+import re
+import sys
+import time
+from calculator_engine import BINARY_OPERATORS, parse, run, to_number
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+BATCH_LINES = 65536  # lines read, evaluated and written at a time
+MIN_VECTOR_ROWS = 8  # smaller groups are cheaper to evaluate one by one
+EXACT_FLOAT_LIMIT = 2.0 ** 53  # integers below this are exact in a float64
+
+# Same literals as calculator_engine.TOKEN. Swapping every number for a placeholder
+# gives a template that parses to the line's shape, so a chunk is grouped with one
+# regex pass per line and the parser only sees each distinct template once. The
+# trailing space keeps neighbouring literals ("1..2") apart, as the tokenizer does.
+NUMBER = re.compile(r'(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?')
+PLACEHOLDER = '0 '
+
+def evaluate_line(shape:tuple, literals:list)->str:
+    try:
+        return str(run(shape, [to_number(literal) for literal in literals]))
+    except ZeroDivisionError:
+        return "error: division by zero"
+    except OverflowError as e:
+        return f"error: {e}"
+
+def checked_operators(failed):
+    """
+    BINARY_OPERATORS for NumPy columns that also mark in the boolean vector `failed`
+    every row dividing by zero or producing inf/nan along the way. Checking only the
+    final value misses those, e.g. 1/(1/0)+5 comes out 5.0 where Python raises.
+    """
+    def checked(function, is_division):
+        def apply(left, right):
+            if is_division:
+                np.logical_or(failed, right == 0, out=failed)
+            value = function(left, right)
+            np.logical_or(failed, ~np.isfinite(value), out=failed)
+            return value
+        return apply
+    return {token: (precedence, checked(function, token == '/'))
+            for token, (precedence, function) in BINARY_OPERATORS.items()}
+
+def evaluate_group(shape:tuple, rows:list, is_float:bool)->list:
+    """
+    Results of one template over many rows of number literals, computed as float64
+    vectors. Every number takes part in the result and |value| <= prod(|n| + 1), so
+    when that bound is below 2**53 each intermediate integer is exact in a float64
+    and the vector result equals Python's. Other rows, rows that divided by zero or
+    went through inf/nan, and float zeros (whose sign can differ from Python's int
+    arithmetic) are evaluated by calculator_engine.run instead.
+    """
+    columns = np.array(rows, dtype=np.float64).T
+    failed = np.zeros(len(rows), dtype=bool)
+    with np.errstate(all='ignore'):
+        values = run(shape, list(columns), checked_operators(failed))
+        exact = np.prod(np.abs(columns) + 1, axis=0) < EXACT_FLOAT_LIMIT
+        exact &= ~failed
+        if is_float:
+            exact &= values != 0
+        else:
+            values = values.astype(np.int64)
+    return [str(value) if ok else evaluate_line(shape, row)
+            for row, value, ok in zip(rows, values.tolist(), exact.tolist())]
+
+def evaluate_batch(lines:list, vectorize:bool=True)->tuple:
+    """
+    Results for a chunk of expression lines, in order, and the number of distinct templates.
+    """
+    results = [None] * len(lines)
+    # (template, has a float literal) -> ([line index], [number literals]); a '.' or
+    # an 'e' outside a number is a syntax error the template keeps anyway.
+    groups = {}
+    for index, line in enumerate(lines):
+        text = line.strip()
+        if not text:
+            results[index] = ""
+            continue
+        indexes, rows = groups.setdefault((NUMBER.sub(PLACEHOLDER, text), '.' in text or 'e' in text or 'E' in text), ([], []))
+        indexes.append(index)
+        rows.append(NUMBER.findall(text))
+    for (template, has_float), (indexes, rows) in groups.items():
+        try:
+            shape, _ = parse(template)
+        except ValueError as e:
+            values = [f"error: {e}"] * len(rows)
+        else:
+            if vectorize and np is not None and len(rows) >= MIN_VECTOR_ROWS:
+                values = evaluate_group(shape, rows, has_float or '/' in shape)
+            else:
+                values = [evaluate_line(shape, literals) for literals in rows]
+        for index, value in zip(indexes, values):
+            results[index] = value
+    return results, len(groups)
+
+def iter_chunks(stream, size:int=BATCH_LINES):
+    chunk = []
+    for line in stream:
+        chunk.append(line)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate calculator expressions line by line without the GUI.")
+    parser.add_argument('input', nargs='?', default='-', help="file with one expression per line (default: stdin)")
+    parser.add_argument('-o', '--output', default='-', help="where to write results (default: stdout)")
+    parser.add_argument('--echo', action='store_true', help="write 'expression = result' instead of just the result")
+    parser.add_argument('--no-numpy', action='store_true', help="evaluate every line on its own")
+    args = parser.parse_args()
+    if np is None and not args.no_numpy:
+        print("NumPy is not installed; evaluating expressions one by one.", file=sys.stderr)
+
+    source = sys.stdin if args.input == '-' else open(args.input, encoding='utf-8')
+    target = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    count = 0
+    templates = 0
+    start = time.perf_counter()
+    try:
+        for chunk in iter_chunks(source):
+            results, chunk_templates = evaluate_batch(chunk, not args.no_numpy)
+            if args.echo:
+                results = [f"{line.strip()} = {result}" for line, result in zip(chunk, results)]
+            target.write('\n'.join(results) + '\n')
+            count += len(chunk)
+            templates += chunk_templates
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if target is not sys.stdout:
+            target.close()
+    elapsed = time.perf_counter() - start
+    print(f"Evaluated {count} expressions in {elapsed:.2f}s "
+          f"({count / elapsed if elapsed else 0:,.0f} expressions/sec, {templates} template groups)", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""
+DesktopPet's movement, targeting and animation-frame logic without Tk, so it can run
+headless on a virtual clock. PetEngine holds the state (float position, target,
+animation frame) and advances it by a given amount of time. PetLoop drives an engine
+the way the pet window does, through any scheduler with Tk's after()/after_cancel()
+and two callbacks that move the window and show a frame.
+
+Usage:
+    engine = PetEngine((1920, 1080), (80, 80), frame_count=4)
+    loop = PetLoop(engine, root, time.perf_counter, move_window, show_frame)
+    loop.start()
+
+pet_profile.py runs the same loop on a virtual clock.
+"""
+
+import random
+import time
+
+# Motion and animation timing
+SPEED_PX_PER_SEC = 8 / 0.12  # the old 8 px per 120 ms frame
+PHYSICS_STEP_SEC = 0.04  # fixed motion timestep (3 per walking tick); drawing interpolates between steps
+ACTIVE_TICK_MS = 120  # tick interval while walking, the old loop's rate; interpolation keeps it smooth
+IDLE_TICK_MS = 480  # tick interval once the target is reached
+FRAME_MS = 120  # how long each animation frame shows while walking
+IDLE_FRAME_MS = 480  # ...and while idle
+TIMER_SLACK_SEC = 0.005  # a tick this much early still counts as on time (float and timer jitter)
+MAX_TICK_GAP_SEC = 0.25  # longest time simulated in one tick, e.g. after the laptop slept
+RETARGET_MS = (3000, 8000)  # pick the next target every 3-8s
+
+# Taskbar area: keep y near bottom (adjust offset if taskbar height differs)
+TASKBAR_OFFSET = 40  # distance above bottom of screen
+TASKBAR_RANGE = 20  # vertical jitter range when not locked to the taskbar
+START_POSITION = (100, 100)
+
+class PetEngine:
+    """
+    Where the pet is, where it is going and which animation frame it shows. Positions
+    are floats of the last two fixed physics steps; the pixel position drawn is
+    interpolated between them, and only reported when it changes.
+    """
+    def __init__(self, screen_size:tuple, pet_size:tuple, frame_count:int, lock_to_taskbar:bool=True,
+                 speed:float=SPEED_PX_PER_SEC, rng=random, position:tuple=START_POSITION):
+        self.screen_width, self.screen_height = screen_size
+        self.pet_w, self.pet_h = pet_size
+        self.frame_count = frame_count
+        self.lock_to_taskbar = lock_to_taskbar
+        # if lock_to_taskbar is True we don't use vertical jitter
+        self.taskbar_range = 0 if lock_to_taskbar else TASKBAR_RANGE
+        self.speed = speed
+        self.rng = rng
+
+        # Movement target; the initial target_y is snapped to the bottom/taskbar area
+        self.target_x = position[0]
+        self.target_y = self.screen_height - self.pet_h - TASKBAR_OFFSET
+        self.x = self.prev_x = float(position[0])
+        self.y = self.prev_y = float(position[1])
+        self.drawn = tuple(position)  # last pixel position handed out by draw_position()
+        self.step_time = 0.0  # time not yet simulated by a physics step
+        self.frame_time = 0.0  # time the current animation frame has been shown
+        self.current_image = 0
+        self.moving = True
+
+    def pick_target(self, screen_size:tuple=None)->int:
+        """
+        Pick a new X target across the screen while keeping Y near the taskbar.
+        Returns the milliseconds until the next target should be picked.
+        """
+        if screen_size is not None:
+            self.screen_width, self.screen_height = screen_size
+        new_x = self.rng.randint(0, max(0, self.screen_width - self.pet_w))
+        base_y = self.screen_height - self.pet_h - TASKBAR_OFFSET
+        if self.lock_to_taskbar:
+            new_y = base_y  # lock vertically to taskbar line
+        else:
+            new_y = base_y + self.rng.randint(-self.taskbar_range, self.taskbar_range)
+        self.target_x = new_x
+        self.target_y = max(0, min(self.screen_height - self.pet_h, new_y))
+        return self.rng.randint(*RETARGET_MS)
+
+    def step(self, elapsed:float)->bool:
+        """
+        Run as many fixed PHYSICS_STEP_SEC steps toward the target as `elapsed` seconds
+        allow (the remainder carries over to the next call). Returns whether the pet is
+        still on its way.
+        """
+        step_time = self.step_time + elapsed
+        if step_time < PHYSICS_STEP_SEC:
+            self.step_time = step_time
+            self.moving = self.x != self.target_x or self.y != self.target_y
+            return self.moving
+        step_px = self.speed * PHYSICS_STEP_SEC
+        target_x, target_y = self.target_x, self.target_y
+        x, y = self.x, self.y
+        # If locked to taskbar, Y stays on the taskbar line and only X moves
+        if self.lock_to_taskbar:
+            y = self.prev_y = float(target_y)
+        while step_time >= PHYSICS_STEP_SEC:
+            step_time -= PHYSICS_STEP_SEC
+            self.prev_x, self.prev_y = x, y
+            dx = target_x - x
+            dy = target_y - y
+            dist = (dx*dx + dy*dy) ** 0.5
+            if dist <= step_px:
+                # close enough; snap to target and stop stepping
+                x = self.prev_x = float(target_x)
+                y = self.prev_y = float(target_y)
+                step_time = 0.0
+                break
+            x += step_px * dx / dist
+            y += step_px * dy / dist
+        self.x, self.y, self.step_time = x, y, step_time
+        self.moving = x != target_x or y != target_y
+        return self.moving
+
+    def advance_frame(self, elapsed:float)->bool:
+        """
+        Move on to the next animation frame when the current one has been shown long
+        enough (FRAME_MS walking, IDLE_FRAME_MS idle). Returns whether the frame changed.
+        """
+        self.frame_time += elapsed
+        frame_sec = (FRAME_MS if self.moving else IDLE_FRAME_MS) / 1000
+        if self.frame_time < frame_sec - TIMER_SLACK_SEC:
+            return False
+        self.frame_time = max(0.0, self.frame_time - frame_sec) % frame_sec
+        next_image = (self.current_image + 1) % self.frame_count
+        if next_image == self.current_image:
+            return False
+        self.current_image = next_image
+        return True
+
+    def draw_position(self):
+        """
+        Pixel position interpolated between the last two steps, or None if the window is already there.
+        """
+        alpha = self.step_time / PHYSICS_STEP_SEC
+        x = round(self.prev_x + (self.x - self.prev_x) * alpha)
+        y = round(self.prev_y + (self.y - self.prev_y) * alpha)
+        if (x, y) == self.drawn:
+            return None
+        self.drawn = (x, y)
+        return self.drawn
+
+class FrameStats:
+    """Tick count and cost, redraws and process CPU time since the pet started."""
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.cpu_started = time.process_time()
+        self.ticks = 0
+        self.tick_seconds = 0.0
+        self.slowest_tick = 0.0
+        self.geometry_updates = 0
+        self.image_updates = 0
+
+    def record_tick(self, seconds:float):
+        self.ticks += 1
+        self.tick_seconds += seconds
+        self.slowest_tick = max(self.slowest_tick, seconds)
+
+    def report(self)->str:
+        wall = max(time.perf_counter() - self.started, 1e-9)
+        cpu = time.process_time() - self.cpu_started
+        mean_ms = self.tick_seconds / self.ticks * 1000 if self.ticks else 0.0
+        return (f"[DesktopPet] {wall:.1f}s: {self.ticks} ticks ({self.ticks / wall:.1f}/s), "
+                f"tick {mean_ms:.3f} ms mean / {self.slowest_tick * 1000:.3f} ms max, "
+                f"{self.geometry_updates} geometry and {self.image_updates} image updates, "
+                f"CPU {cpu / wall:.2%}")
+
+class PetLoop:
+    """
+    The pet's tick and retarget timers. `scheduler` has Tk's after(ms, callback) and
+    after_cancel(id), `clock` returns seconds, move_window(x, y) and show_frame(index)
+    draw, and screen_size() (optional) returns the current (width, height).
+    Ticks come every ACTIVE_TICK_MS while walking and every IDLE_TICK_MS once the
+    target is reached (always ACTIVE_TICK_MS without `idle_aware`), until a new
+    target wakes the pet up again.
+    """
+    def __init__(self, engine:PetEngine, scheduler, clock, move_window, show_frame, screen_size=None,
+                 idle_aware:bool=True):
+        self.engine = engine
+        self.scheduler = scheduler
+        self.clock = clock
+        self.move_window = move_window
+        self.show_frame = show_frame
+        self.screen_size = screen_size
+        self.idle_aware = idle_aware
+        self.tick_id = None
+        self.last_tick = clock()
+        self.stats = FrameStats()
+
+    def start(self):
+        # Start animation and movement
+        self.last_tick = self.clock()
+        self.animate()
+        self.schedule_new_target()
+
+    def animate(self):
+        """
+        One tick: advance motion and the animation frame by the time since the last
+        tick, redraw only what changed and schedule the next tick.
+        """
+        start = time.perf_counter()
+        now = self.clock()
+        elapsed = min(now - self.last_tick, MAX_TICK_GAP_SEC)  # no teleporting after a stall
+        self.last_tick = now
+        engine = self.engine
+        moving = engine.step(elapsed)
+        if engine.advance_frame(elapsed):
+            self.show_frame(engine.current_image)
+            self.stats.image_updates += 1
+        position = engine.draw_position()
+        if position is not None:
+            self.move_window(*position)
+            self.stats.geometry_updates += 1
+        self.tick_id = self.scheduler.after(ACTIVE_TICK_MS if moving or not self.idle_aware else IDLE_TICK_MS,
+                                            self.animate)
+        self.stats.record_tick(time.perf_counter() - start)
+
+    def wake(self):
+        """Tick right away instead of waiting out an idle interval."""
+        if self.engine.moving or self.tick_id is None:
+            return
+        self.scheduler.after_cancel(self.tick_id)
+        self.last_tick = self.clock()  # nothing moved while idle
+        self.animate()
+
+    def schedule_new_target(self):
+        delay = self.engine.pick_target(self.screen_size() if self.screen_size is not None else None)
+        self.wake()
+        # choose next target in a bit (move while animating)
+        self.scheduler.after(delay, self.schedule_new_target)
@@ -0,0 +1,240 @@
+"""
+Headless profiler for the DesktopPet engine: runs PetEngine and PetLoop on a virtual
+clock, so hours of pet time pass in seconds without a display, and reports what the
+animation costs: ticks, time per tick, memory allocated per tick, and how often the
+window would be moved or its image changed. The same numbers are measured for a
+replica of the old fixed 120 ms loop (LegacyPet) as the baseline.
+
+Usage: python pet_profile.py --hours 2 --frames 4 --seed 1
+       python pet_profile.py --always-active --json pet_profile.json
+"""
+
+import argparse
+import heapq
+import json
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from array import array
+from itertools import count
+from pet_engine import PetEngine, PetLoop, FrameStats, TASKBAR_OFFSET, RETARGET_MS
+
+ALLOCATION_MINUTES = 10  # pet time profiled under tracemalloc (it slows every tick down)
+
+class VirtualClock:
+    """
+    A clock and timer queue with Tk's after()/after_cancel(). Time only moves when
+    run_until() jumps to the next due timer, so nothing ever waits.
+    """
+    def __init__(self):
+        self.now = 0.0
+        self.timers = []  # heap of (due time, timer id, callback)
+        self.ids = count(1)
+        self.cancelled = set()
+
+    def __call__(self)->float:
+        return self.now
+
+    def after(self, ms:int, callback)->int:
+        timer_id = next(self.ids)
+        heapq.heappush(self.timers, (self.now + ms / 1000, timer_id, callback))
+        return timer_id
+
+    def after_cancel(self, timer_id:int):
+        self.cancelled.add(timer_id)
+
+    def run_until(self, end:float):
+        while self.timers and self.timers[0][0] <= end:
+            due, timer_id, callback = heapq.heappop(self.timers)
+            if timer_id in self.cancelled:
+                self.cancelled.discard(timer_id)
+                continue
+            self.now = due
+            callback()
+        self.now = end
+
+class ProfileStats(FrameStats):
+    """
+    FrameStats that also keeps every tick's duration, or (with `allocations`) the
+    tracemalloc peak and net growth between the end of one tick and the next.
+    """
+    def __init__(self, allocations:bool=False):
+        super().__init__()
+        self.allocations = allocations
+        self.durations = None if allocations else array('d')
+        self.geometry_reads = 0  # root.geometry() read-backs (only the old loop does them)
+        self.peak_bytes = 0
+        self.retained_bytes = 0
+        self.baseline = None
+
+    def record_tick(self, seconds:float):
+        super().record_tick(seconds)
+        if not self.allocations:
+            self.durations.append(seconds)
+            return
+        current, peak = tracemalloc.get_traced_memory()
+        if self.baseline is not None:
+            self.peak_bytes += peak - self.baseline
+            self.retained_bytes += current - self.baseline
+        tracemalloc.reset_peak()
+        self.baseline = current
+
+class LegacyPet:
+    """
+    DesktopPet's loop from before PetEngine, kept as the baseline to compare against
+    (locked to the taskbar, as DesktopPet runs by default): a tick every 120 ms that
+    always shows the next frame, reads the position back out of the geometry string
+    and sets the geometry again, even once the pet has arrived.
+    """
+    def __init__(self, clock:VirtualClock, screen:tuple, frames:int, rng):
+        self.clock = clock
+        self.screen_width, self.screen_height = screen
+        self.frames = frames
+        self.rng = rng
+        self.stats = FrameStats()
+        self.window = "80x80+100+100"  # what root.geometry() would return
+        self.current_image = 0
+        self.pet_w = self.pet_h = 80
+        self.target_x = 100
+        self.target_y = self.screen_height - self.pet_h - TASKBAR_OFFSET
+        self.speed = 8  # pixels per frame
+
+    def geometry(self, position:str=None):
+        if position is None:
+            self.stats.geometry_reads += 1
+            return self.window
+        self.window = f"{self.pet_w}x{self.pet_h}{position}"
+        self.stats.geometry_updates += 1
+
+    def start(self):
+        self.animate()
+        self.schedule_new_target()
+
+    def animate(self):
+        start = time.perf_counter()
+        self.current_image = (self.current_image + 1) % self.frames
+        self.stats.image_updates += 1  # label.config(image=...) on every tick
+        self.smooth_move_step()
+        self.clock.after(120, self.animate)
+        self.stats.record_tick(time.perf_counter() - start)
+
+    def schedule_new_target(self):
+        self.target_x = self.rng.randint(0, max(0, self.screen_width - self.pet_w))
+        self.target_y = max(0, min(self.screen_height - self.pet_h, self.screen_height - self.pet_h - TASKBAR_OFFSET))
+        self.clock.after(self.rng.randint(*RETARGET_MS), self.schedule_new_target)
+
+    def smooth_move_step(self):
+        cur_x = int(self.geometry().split('+')[1])
+        dx = self.target_x - cur_x
+        dist = max(1, abs(dx))
+        if dist < 2:
+            self.geometry(f"+{self.target_x}+{self.target_y}")
+            return
+        self.geometry(f"+{cur_x + int(self.speed * dx / dist)}+{self.target_y}")
+
+def run_pet(seconds:float, frames:int, screen:tuple, seed, idle_aware:bool, allocations:bool=False,
+            legacy:bool=False)->ProfileStats:
+    """
+    Run the pet (or with `legacy`, the old loop) for `seconds` of virtual time with
+    drawing callbacks that do nothing.
+    """
+    clock = VirtualClock()
+    if legacy:
+        loop = LegacyPet(clock, screen, frames, random.Random(seed))
+    else:
+        engine = PetEngine(screen, (80, 80), frames, rng=random.Random(seed))
+        loop = PetLoop(engine, clock, clock, lambda x, y: None, lambda index: None, idle_aware=idle_aware)
+    loop.stats = ProfileStats(allocations)
+    if allocations:
+        tracemalloc.start()
+    try:
+        loop.start()
+        clock.run_until(seconds)
+    finally:
+        if allocations:
+            tracemalloc.stop()
+    return loop.stats
+
+def profile(hours:float, frames:int=4, screen:tuple=(1920, 1080), seed=None, idle_aware:bool=True,
+            allocation_minutes:float=ALLOCATION_MINUTES, legacy:bool=False)->dict:
+    seconds = hours * 3600
+    start = time.perf_counter()
+    stats = run_pet(seconds, frames, screen, seed, idle_aware, legacy=legacy)
+    wall = time.perf_counter() - start
+    durations = sorted(stats.durations)
+    quantiles = statistics.quantiles(durations, n=100) if len(durations) > 1 else durations * 99
+    allocation_stats = run_pet(allocation_minutes * 60, frames, screen, seed, idle_aware, True, legacy)
+    measured = max(1, allocation_stats.ticks - 1)  # the first tick only sets the baseline
+    return {
+        'pet_seconds': seconds,
+        'wall_seconds': wall,
+        'ticks': stats.ticks,
+        'ticks_per_pet_second': stats.ticks / seconds,
+        'tick_us_mean': stats.tick_seconds / stats.ticks * 1e6,
+        'tick_us_p50': quantiles[49] * 1e6,
+        'tick_us_p99': quantiles[98] * 1e6,
+        'tick_us_max': stats.slowest_tick * 1e6,
+        'geometry_updates': stats.geometry_updates,
+        'image_updates': stats.image_updates,
+        'tk_calls': stats.geometry_updates + stats.image_updates + stats.geometry_reads,
+        'alloc_peak_bytes_per_tick': allocation_stats.peak_bytes / measured,
+        'alloc_retained_bytes_per_tick': allocation_stats.retained_bytes / measured,
+    }
+
+def parse_screen(text:str)->tuple:
+    try:
+        width, height = (int(part) for part in text.lower().split('x'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected WIDTHxHEIGHT, got {text!r}")
+    return width, height
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate the desktop pet on a virtual clock and profile its ticks.")
+    parser.add_argument('--hours', type=float, default=2.0, help="pet time to simulate")
+    parser.add_argument('--frames', type=int, default=4, help="animation frames of the sprite")
+    parser.add_argument('--screen', type=parse_screen, default=(1920, 1080), help="screen size as WIDTHxHEIGHT")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--always-active', action='store_true', help="tick at the walking rate even when idle")
+    parser.add_argument('--alloc-minutes', type=float, default=ALLOCATION_MINUTES,
+                        help="pet time profiled under tracemalloc")
+    parser.add_argument('--json', metavar='PATH', help="also write the results as JSON")
+    args = parser.parse_args()
+    if args.hours <= 0 or args.frames < 1:
+        sys.exit("--hours must be positive and --frames at least 1")
+
+    # Both runs use the same seed, so the pet walks to the same targets at the same times.
+    seed = args.seed if args.seed is not None else random.randrange(1 << 32)
+    results = {
+        'old_loop': profile(args.hours, args.frames, args.screen, seed, allocation_minutes=args.alloc_minutes,
+                            legacy=True),
+        'engine': profile(args.hours, args.frames, args.screen, seed, not args.always_active, args.alloc_minutes),
+    }
+    mode = "always active" if args.always_active else "idle-aware"
+    print(f"Simulated {args.hours:g} h of pet time, {args.frames} frames, seed {seed}; engine {mode}")
+    rows = [
+        ("ticks per pet second", lambda result: result['ticks_per_pet_second'], ".1f"),
+        ("tick cost mean (µs)", lambda result: result['tick_us_mean'], ".2f"),
+        ("tick cost p50 (µs)", lambda result: result['tick_us_p50'], ".2f"),
+        ("tick cost p99 (µs)", lambda result: result['tick_us_p99'], ".2f"),
+        ("tick cost max (µs)", lambda result: result['tick_us_max'], ".2f"),
+        ("geometry updates / min", lambda result: result['geometry_updates'] / result['pet_seconds'] * 60, ",.0f"),
+        ("image updates / min", lambda result: result['image_updates'] / result['pet_seconds'] * 60, ",.0f"),
+        ("Tk calls / min", lambda result: result['tk_calls'] / result['pet_seconds'] * 60, ",.0f"),
+        ("alloc peak B / tick", lambda result: result['alloc_peak_bytes_per_tick'], ".0f"),
+        ("alloc retained B / tick", lambda result: result['alloc_retained_bytes_per_tick'], ".2f"),
+        ("wall seconds", lambda result: result['wall_seconds'], ".2f"),
+    ]
+    print(f"{'':<24} {'old loop':>10} {'engine':>10}")
+    for name, value, spec in rows:
+        print(f"{name:<24} {value(results['old_loop']):>10{spec}} {value(results['engine']):>10{spec}}")
+    print(f"(tick cost is the Python side only, Tk calls not included; allocations over "
+          f"{args.alloc_minutes:g} pet minutes under tracemalloc)")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results saved to {args.json}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""
+Sprite loading for DesktopPet. The first start decodes every frame image (animated
+GIFs frame by frame), resizes it to the pet size and writes the raw RGBA pixels of
+all frames into one atlas file. Later starts check the atlas key (the source file
+names, mtimes and sizes plus the target size) and map the atlas with mmap instead of
+decoding anything. PhotoImages are made from the mapped pixels on demand and only
+the most recently shown ones are kept alive.
+
+Usage:
+    sprites = load_sprites(PET_ASSETS_DIR, fallback_paths)
+    frames = PhotoCache(sprites)
+    label.config(image=frames.get(index))
+
+Run it directly to time a cold build against a cached load: python pet_sprites.py [image_dir]
+"""
+
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import time
+from collections import OrderedDict
+from PIL import Image, ImageDraw, ImageSequence
+
+SPRITE_SIZE = (80, 80)
+SUPPORTED_EXTS = (".png", ".gif", ".jpg", ".jpeg")
+ATLAS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".pet_sprite_atlas")
+PHOTO_CACHE_SIZE = 16  # PhotoImages kept alive at once
+# Image.ANTIALIAS was removed in Pillow 10; Resampling.LANCZOS is the same filter.
+LANCZOS = getattr(Image, 'Resampling', Image).LANCZOS
+
+# magic, SHA-1 of the source key, frame width, frame height, frame count; RGBA frames follow.
+ATLAS_MAGIC = b"PETATLS1"
+ATLAS_HEADER = struct.Struct("<8s20sHHI")
+
+def find_sources(assets_dir:str, fallback_paths=())->list:
+    """
+    Frame images in `assets_dir` (sorted for a consistent animation order), or the
+    existing `fallback_paths` when that folder has none.
+    """
+    paths = []
+    if not os.path.isdir(assets_dir):
+        print(f"[DesktopPet] image folder not found; create and add frames here: {assets_dir}")
+    else:
+        print(f"[DesktopPet] loading images from: {assets_dir} (supported: {', '.join(SUPPORTED_EXTS)})")
+        try:
+            paths = [os.path.join(assets_dir, fname) for fname in sorted(os.listdir(assets_dir))
+                     if fname.lower().endswith(SUPPORTED_EXTS)]
+        except OSError as e:
+            print(f"[DesktopPet] error accessing assets dir: {e}")
+    return paths or [path for path in fallback_paths if os.path.exists(path)]
+
+def source_key(paths:list, size:tuple)->bytes:
+    """
+    Digest of everything the atlas depends on; any added, removed or touched file changes it.
+    """
+    digest = hashlib.sha1(f"{size[0]}x{size[1]}".encode())
+    for path in paths:
+        stat = os.stat(path)
+        digest.update(f"\0{os.path.abspath(path)}\0{stat.st_mtime_ns}\0{stat.st_size}".encode())
+    return digest.digest()
+
+def iter_frames(path:str, size:tuple):
+    """
+    RGBA bytes of each frame of an image, resized to `size`; one frame decoded at a time.
+    """
+    with Image.open(path) as image:
+        for frame in ImageSequence.Iterator(image):
+            yield frame.convert("RGBA").resize(size, LANCZOS).tobytes()
+
+def build_atlas(paths:list, size:tuple=SPRITE_SIZE, atlas_path:str=ATLAS_PATH)->int:
+    """
+    Write the atlas of every frame of `paths` and return the number of frames.
+    Frames are streamed to a temporary file that replaces the atlas when complete.
+    """
+    key = source_key(paths, size)
+    count = 0
+    temporary = f"{atlas_path}.{os.getpid()}.tmp"
+    with open(temporary, 'wb') as f:
+        f.write(ATLAS_HEADER.pack(ATLAS_MAGIC, key, size[0], size[1], 0))
+        for path in paths:
+            try:
+                for pixels in iter_frames(path, size):
+                    f.write(pixels)
+                    count += 1
+            except Exception as e:
+                print(f"[DesktopPet] failed to load {path}: {e}")
+        f.seek(0)
+        f.write(ATLAS_HEADER.pack(ATLAS_MAGIC, key, size[0], size[1], count))
+    os.replace(temporary, atlas_path)
+    return count
+
+class SpriteAtlas:
+    """
+    Equal-size RGBA frames stored back to back in one buffer (an mmap of the atlas
+    file or plain bytes). frame_image() wraps a frame's pixels without copying them.
+    """
+    def __init__(self, buffer, size:tuple, count:int, offset:int=0):
+        self.buffer = buffer
+        self.size = size
+        self.count = count
+        self.offset = offset
+        self.frame_bytes = size[0] * size[1] * 4
+
+    def __len__(self):
+        return self.count
+
+    def frame_image(self, index:int)->Image.Image:
+        start = self.offset + index * self.frame_bytes
+        pixels = memoryview(self.buffer)[start:start + self.frame_bytes]
+        return Image.frombuffer("RGBA", self.size, pixels, "raw", "RGBA", 0, 1)
+
+    def close(self):
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
+
+def open_atlas(paths:list, size:tuple=SPRITE_SIZE, atlas_path:str=ATLAS_PATH):
+    """
+    The cached atlas mapped into memory, or None if it is missing or stale.
+    """
+    try:
+        with open(atlas_path, 'rb') as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):  # ValueError: an empty file cannot be mapped
+        return None
+    if len(buffer) >= ATLAS_HEADER.size:
+        magic, key, width, height, count = ATLAS_HEADER.unpack_from(buffer)
+        atlas = SpriteAtlas(buffer, (width, height), count, ATLAS_HEADER.size)
+        if (magic == ATLAS_MAGIC and (width, height) == tuple(size) and count
+                and len(buffer) == ATLAS_HEADER.size + count * atlas.frame_bytes
+                and key == source_key(paths, size)):
+            return atlas
+    buffer.close()
+    return None
+
+def placeholder_frame(size:tuple=SPRITE_SIZE)->Image.Image:
+    """
+    A cute circular pet with eyes and a small smile, drawn for when there are no images.
+    """
+    base = Image.new("RGBA", (80, 80), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(base)
+    # body
+    draw.ellipse((4, 8, 76, 72), fill=(255, 167, 167, 255), outline=(200,80,80,255))
+    # left eye
+    draw.ellipse((24, 28, 32, 36), fill=(0,0,0,255))
+    # right eye
+    draw.ellipse((48, 28, 56, 36), fill=(0,0,0,255))
+    # smile
+    draw.arc((28, 36, 52, 56), start=10, end=170, fill=(0,0,0,255), width=2)
+    return base if tuple(size) == (80, 80) else base.resize(size, LANCZOS)
+
+def load_sprites(assets_dir:str, fallback_paths=(), size:tuple=SPRITE_SIZE, atlas_path:str=ATLAS_PATH)->SpriteAtlas:
+    """
+    All pet frames: from the cached atlas when it is current, otherwise rebuilt from
+    the source images, or the drawn placeholder when there are none.
+    """
+    paths = find_sources(assets_dir, fallback_paths)
+    if paths:
+        atlas = open_atlas(paths, size, atlas_path)
+        if atlas is None:
+            try:
+                build_atlas(paths, size, atlas_path)
+            except OSError as e:
+                print(f"[DesktopPet] could not write sprite atlas {atlas_path}: {e}")
+            atlas = open_atlas(paths, size, atlas_path)
+        if atlas is not None:
+            return atlas
+    print(f"[DesktopPet] no pet images found; using drawn placeholder pet.")
+    return SpriteAtlas(placeholder_frame(size).tobytes(), tuple(size), 1)
+
+class PhotoCache:
+    """
+    LRU of PhotoImages made from atlas frames. A label only keeps the Tk name of its
+    image, so get() the shown frame each time it is displayed: that keeps it the most
+    recently used and never evicted while on screen.
+    """
+    def __init__(self, atlas:SpriteAtlas, capacity:int=PHOTO_CACHE_SIZE, make_photo=None):
+        self.atlas = atlas
+        self.capacity = max(2, capacity)
+        self.photos = OrderedDict()  # frame index -> PhotoImage
+        if make_photo is None:
+            from PIL import ImageTk
+            make_photo = ImageTk.PhotoImage
+        self.make_photo = make_photo
+
+    def get(self, index:int):
+        photo = self.photos.get(index)
+        if photo is not None:
+            self.photos.move_to_end(index)
+            return photo
+        photo = self.photos[index] = self.make_photo(self.atlas.frame_image(index))
+        if len(self.photos) > self.capacity:
+            self.photos.popitem(last=False)
+        return photo
+
+if __name__ == "__main__":
+    assets_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(os.path.abspath(__file__)), "pet_images")
+    paths = find_sources(assets_dir)
+    if not paths:
+        sys.exit("No frame images to time.")
+    atlas_path = os.path.join(assets_dir, ".benchmark_atlas")
+    start = time.perf_counter()
+    count = build_atlas(paths, SPRITE_SIZE, atlas_path)
+    built = time.perf_counter() - start
+    start = time.perf_counter()
+    atlas = open_atlas(paths, SPRITE_SIZE, atlas_path)
+    frames = [atlas.frame_image(index) for index in range(len(atlas))]
+    loaded = time.perf_counter() - start
+    print(f"{len(paths)} files, {count} frames of {SPRITE_SIZE[0]}x{SPRITE_SIZE[1]}")
+    print(f"decode + resize + write atlas: {built * 1000:8.1f} ms")
+    print(f"mmap cached atlas:             {loaded * 1000:8.1f} ms")
+    del frames
+    atlas.close()
+    os.remove(atlas_path)
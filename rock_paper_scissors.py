@@ -6,50 +6,193 @@ Add the score of who wins each round and allows the game to continue until the
 player types "quit".
 """
 import random
+from array import array
+from functools import partial
+
+# Moves are small ints everywhere in the game logic: rock 0, paper 1, scissors 2.
+MOVES = ['rock', 'paper', 'scissors']
+MOVE_CODES = {'rock': 0, 'paper': 1, 'scissors': 2, 'r': 0, 'p': 1, 's': 2}
+# PAYOFF[player][computer]: 1 the player wins, 0 a tie, -1 the computer wins.
+# Each move beats the one before it, wrapping around: paper > rock, scissors > paper, rock > scissors.
+PAYOFF = (
+    (0, -1, 1),
+    (1, 0, -1),
+    (-1, 1, 0),
+)
+RESULTS = {1: "You win!", 0: "It's a tie!", -1: "Computer wins!"}
 
 def get_computer_choice():
-    return random.choice(['rock', 'paper', 'scissors'])
+    return random.choice(MOVES)
+
+def play_round(player, computer):
+    """
+    Outcome for the player as 1/0/-1; either move may be a name or the r/p/s shorthand.
+    """
+    return PAYOFF[MOVE_CODES[player]][MOVE_CODES[computer]]
 
 def determine_winner(player, computer):
-    if player == 'r':
-        player = 'rock'
-    elif player == 'p':
-        player = 'paper'
-    elif player == 's':
-        player = 'scissors'
-
-    if player == computer:
-        return "It's a tie!"
-    elif (player == 'rock' and computer == 'scissors') or \
-         (player == 'paper' and computer == 'rock') or \
-         (player == 'scissors' and computer == 'paper'):
-        return "You win!"
-    else:
-        return "Computer wins!"
-
-def main():
+    return RESULTS[play_round(player, computer)]
+
+class RandomOpponent:
+    """
+    The original computer: a uniformly random move, ignoring the player.
+    """
+    def choose(self):
+        return get_computer_choice()
+
+    def observe(self, player_move):
+        pass
+
+class MarkovOpponent:
+    """
+    Predicts the player's next move from their last `order` moves (an order-k Markov
+    chain) and plays what beats it. Counts live in one fixed array of 3**order * 3
+    slots indexed by (context, next move); the context is the last moves in base 3,
+    updated with one multiply-add. When a context is seen again its row is decayed
+    first, so old habits fade. Every choose()/observe() touches one row: O(1) time
+    and memory that never grows however long the session runs.
+    """
+    def __init__(self, order=2, decay=0.9, rng=random):
+        self.order = order
+        self.decay = decay
+        self.rng = rng
+        self.contexts = 3 ** order
+        self.counts = array('d', bytes(8 * self.contexts * 3))
+        self.overall = array('d', [0.0, 0.0, 0.0])  # order-0 fallback for unseen contexts
+        self.context = 0
+        self.seen = 0  # player moves observed, capped at `order`
+
+    def predict(self):
+        """
+        Most likely next player move code, or None without any history to go on.
+        """
+        counts, row = (self.counts, self.context * 3) if self.seen >= self.order else (self.overall, 0)
+        rock, paper, scissors = counts[row], counts[row + 1], counts[row + 2]
+        if not (rock or paper or scissors):
+            rock, paper, scissors = self.overall
+            if not (rock or paper or scissors):
+                return None
+        best = max(rock, paper, scissors)
+        if (rock == best) + (paper == best) + (scissors == best) > 1:
+            return self.rng.choice([move for move, count in enumerate((rock, paper, scissors)) if count == best])
+        return 0 if rock == best else 1 if paper == best else 2
+
+    def choose(self):
+        predicted = self.predict()
+        if predicted is None:
+            return get_computer_choice()
+        return MOVES[(predicted + 1) % 3]  # the move that beats the prediction
+
+    def observe(self, player_move):
+        move = MOVE_CODES[player_move] if isinstance(player_move, str) else player_move
+        decay = self.decay
+        if self.seen >= self.order:
+            counts = self.counts
+            row = self.context * 3
+            counts[row] *= decay
+            counts[row + 1] *= decay
+            counts[row + 2] *= decay
+            counts[row + move] += 1.0
+        else:
+            self.seen += 1
+        overall = self.overall
+        overall[0] *= decay
+        overall[1] *= decay
+        overall[2] *= decay
+        overall[move] += 1.0
+        self.context = (self.context * 3 + move) % self.contexts
+
+OPPONENTS = {'random': RandomOpponent, 'adaptive': MarkovOpponent}
+
+# Scripted bots: fixed habits to measure the opponents against, with the same
+# choose()/observe() interface. Shared by rps_ai_benchmark and rps_tournament.
+BIASED_WEIGHTS = (0.5, 0.3, 0.2)  # rock/paper/scissors weights of the biased bot
+
+class ConstantBot:
+    def __init__(self, move:str):
+        self.move = move
+
+    def choose(self):
+        return self.move
+
+    def observe(self, opponent_move):
+        pass
+
+class CycleBot:
+    """
+    Plays `moves` in order, over and over: rock, paper, scissors, rock... by default.
+    """
+    def __init__(self, moves=MOVES):
+        self.moves = moves
+        self.next = 0
+
+    def choose(self):
+        move = self.moves[self.next]
+        self.next = (self.next + 1) % len(self.moves)
+        return move
+
+    def observe(self, opponent_move):
+        pass
+
+class BiasedBot:
+    def __init__(self, weights=BIASED_WEIGHTS, rng=random):
+        self.weights = weights
+        self.rng = rng
+
+    def choose(self):
+        return self.rng.choices(MOVES, self.weights)[0]
+
+    def observe(self, opponent_move):
+        pass
+
+class BeatLastBot:
+    """
+    Plays whatever would have beaten the opponent's previous move (rock at first).
+    """
+    def __init__(self):
+        self.move = 'rock'
+
+    def choose(self):
+        return self.move
+
+    def observe(self, opponent_move):
+        self.move = MOVES[(MOVE_CODES[opponent_move] + 1) % 3]
+
+# name -> bot factory. Tournament workers get these pickled, so no lambdas.
+SCRIPTED_BOTS = {
+    'rock': partial(ConstantBot, 'rock'),
+    'cycle': CycleBot,
+    'biased': BiasedBot,
+    'beat-last': BeatLastBot,
+}
+
+def main(opponent_name=None):
     player_score = 0
     computer_score = 0
+    while opponent_name not in OPPONENTS:
+        opponent_name = input("Opponent (random or adaptive) [random]: ").lower() or 'random'
+    opponent = OPPONENTS[opponent_name]()
 
     while True:
         player_choice = input("Enter rock, paper, scissors or quit to exit: ").lower()
         if player_choice == 'quit':
             break
 
-        if player_choice not in ['rock', 'paper', 'scissors', 'r', 'p', 's']:
+        if player_choice not in MOVE_CODES:
             print("Invalid choice. Please try again.")
             continue
 
 
-        computer_choice = get_computer_choice()
+        computer_choice = opponent.choose()
         print(f"Computer chose: {computer_choice}")
 
-        result = determine_winner(player_choice, computer_choice)
-        print(result)
+        outcome = play_round(player_choice, computer_choice)
+        opponent.observe(player_choice)
+        print(RESULTS[outcome])
 
-        if result == "You win!":
+        if outcome == 1:
             player_score += 1
-        elif result == "Computer wins!":
+        elif outcome == -1:
             computer_score += 1
 
         print(f"Score - You: {player_score}, Computer: {computer_score}\n")
@@ -59,44 +202,49 @@ def main():
 # --- GUI Implementation ---
 import tkinter as tk
 from tkinter import messagebox
+from tk_theme import theme_for, PALETTE
 
 
 class RPSGameGUI:
     def __init__(self, master):
         self.master = master
         master.title("Rock Paper Scissors")
-        master.configure(bg="#222831")  # Dark background
+        master.configure(bg=PALETTE['background'])  # Dark background
         self.player_score = 0
         self.computer_score = 0
         self.tie_score = 0
         self.rounds = 0
 
-        label_fg = "#eeeeee"
-        label_bg = "#222831"
-        button_bg = "#00adb5"
-        button_fg = "#222831"
-        scoreboard_bg = "#393e46"
-        scoreboard_fg = "#ffd369"
+        theme = theme_for(master)
 
-        self.label = tk.Label(master, text="Choose Rock, Paper, or Scissors:", font=("Arial", 14, "bold"), fg=label_fg, bg=label_bg)
+        self.label = theme.label(master, 'rps_heading', text="Choose Rock, Paper, or Scissors:")
         self.label.pack(pady=10)
 
-        self.button_frame = tk.Frame(master, bg=label_bg)
+        self.button_frame = theme.frame(master, 'rps_panel')
         self.button_frame.pack()
-        self.rock_button = tk.Button(self.button_frame, text="Rock", width=10, font=("Arial", 12, "bold"), bg=button_bg, fg=button_fg, activebackground="#ffd369", command=lambda: self.play('rock'))
+        self.rock_button = theme.button(self.button_frame, 'rps_choice', text="Rock", command=lambda: self.play('rock'))
         self.rock_button.grid(row=0, column=0, padx=5)
-        self.paper_button = tk.Button(self.button_frame, text="Paper", width=10, font=("Arial", 12, "bold"), bg=button_bg, fg=button_fg, activebackground="#ffd369", command=lambda: self.play('paper'))
+        self.paper_button = theme.button(self.button_frame, 'rps_choice', text="Paper", command=lambda: self.play('paper'))
         self.paper_button.grid(row=0, column=1, padx=5)
-        self.scissors_button = tk.Button(self.button_frame, text="Scissors", width=10, font=("Arial", 12, "bold"), bg=button_bg, fg=button_fg, activebackground="#ffd369", command=lambda: self.play('scissors'))
+        self.scissors_button = theme.button(self.button_frame, 'rps_choice', text="Scissors", command=lambda: self.play('scissors'))
         self.scissors_button.grid(row=0, column=2, padx=5)
 
-        self.result_label = tk.Label(master, text="", font=("Arial", 12), fg="#ffd369", bg=label_bg)
+        # Every opponent watches every round, so switching mid-game keeps what the adaptive one learned.
+        self.opponents = {name: opponent() for name, opponent in OPPONENTS.items()}
+        self.opponent_name = tk.StringVar(master, value='random')
+        self.mode_frame = theme.frame(master, 'rps_panel')
+        self.mode_frame.pack(pady=(10, 0))
+        for column, name in enumerate(OPPONENTS):
+            theme.radiobutton(self.mode_frame, 'rps_mode', text=f"{name.capitalize()} computer",
+                              variable=self.opponent_name, value=name).grid(row=0, column=column, padx=5)
+
+        self.result_label = theme.label(master, 'rps_result', text="")
         self.result_label.pack(pady=10)
 
-        self.scoreboard_label = tk.Label(master, text=self.get_scoreboard_text(), font=("Arial", 12, "bold"), justify="left", bg=scoreboard_bg, fg=scoreboard_fg, bd=2, relief="groove", padx=10, pady=5)
+        self.scoreboard_label = theme.label(master, 'rps_scoreboard', text=self.get_scoreboard_text())
         self.scoreboard_label.pack(pady=5)
 
-        self.quit_button = tk.Button(master, text="Quit", font=("Arial", 11, "bold"), bg="#ff2e63", fg="white", activebackground="#393e46", command=master.quit)
+        self.quit_button = theme.button(master, 'rps_quit', text="Quit", command=master.quit)
         self.quit_button.pack(pady=5)
 
     def get_scoreboard_text(self):
@@ -106,19 +254,21 @@ class RPSGameGUI:
                 f"Ties: {self.tie_score}")
 
     def play(self, player_choice):
-        computer_choice = get_computer_choice()
-        result = determine_winner(player_choice, computer_choice)
+        computer_choice = self.opponents[self.opponent_name.get()].choose()
+        outcome = play_round(player_choice, computer_choice)
+        for opponent in self.opponents.values():
+            opponent.observe(player_choice)
         self.rounds += 1
-        if result == "You win!":
+        if outcome == 1:
             self.player_score += 1
-        elif result == "Computer wins!":
+        elif outcome == -1:
             self.computer_score += 1
-        elif result == "It's a tie!":
+        else:
             self.tie_score += 1
-        self.result_label.config(text=f"Computer chose: {computer_choice}\n{result}")
+        self.result_label.config(text=f"Computer chose: {computer_choice}\n{RESULTS[outcome]}")
         self.scoreboard_label.config(text=self.get_scoreboard_text())
 if __name__ == "__main__":
-    # Uncomment the next line to use CLI version
+    # Uncomment the next line to use CLI version (pass 'random' or 'adaptive' to skip the prompt)
     # main()
     root = tk.Tk()
     app = RPSGameGUI(root)
@@ -0,0 +1,64 @@
+"""
+Benchmark for the adaptive Rock Paper Scissors opponent: plays MarkovOpponent
+against scripted player patterns and reports how often it wins and how long one
+round of choose() + observe() takes.
+
+Usage: python rps_ai_benchmark.py --rounds 100000 --order 2 --decay 0.9
+"""
+
+import argparse
+import random
+import time
+from functools import partial
+from rock_paper_scissors import OPPONENTS, SCRIPTED_BOTS, CycleBot, RandomOpponent, play_round
+
+# name -> factory, so every match starts with a fresh player
+PLAYERS = {
+    'rock': SCRIPTED_BOTS['rock'],
+    'cycle': SCRIPTED_BOTS['cycle'],
+    'pattern': partial(CycleBot, ['rock', 'rock', 'paper', 'paper', 'scissors']),
+    'biased': SCRIPTED_BOTS['biased'],
+    'beat-last': SCRIPTED_BOTS['beat-last'],
+    'uniform': RandomOpponent,
+}
+
+def play_match(player, opponent, rounds:int)->dict:
+    """
+    Computer wins/ties/losses over `rounds` rounds, and nanoseconds per choose() + observe().
+    """
+    counts = {1: 0, 0: 0, -1: 0}  # outcome for the player
+    spent = 0
+    clock = time.perf_counter_ns
+    for _ in range(rounds):
+        move = player.choose()
+        start = clock()
+        computer = opponent.choose()
+        opponent.observe(move)
+        spent += clock() - start
+        player.observe(computer)
+        counts[play_round(move, computer)] += 1
+    return {'wins': counts[-1], 'ties': counts[0], 'losses': counts[1], 'ns_per_round': spent / rounds}
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the adaptive RPS opponent against scripted players.")
+    parser.add_argument('--rounds', type=int, default=100_000)
+    parser.add_argument('--order', type=int, default=2, help="player moves the predictor conditions on")
+    parser.add_argument('--decay', type=float, default=0.9, help="weight kept by old counts per update")
+    parser.add_argument('--opponent', choices=OPPONENTS, default='adaptive')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    print(f"{args.opponent} computer, {args.rounds:,} rounds per player")
+    print(f"{'player':<10} {'win %':>7} {'tie %':>7} {'loss %':>7} {'ns/round':>9}")
+    for name, make_player in PLAYERS.items():
+        if args.opponent == 'adaptive':
+            opponent = OPPONENTS['adaptive'](order=args.order, decay=args.decay)
+        else:
+            opponent = OPPONENTS[args.opponent]()
+        result = play_match(make_player(), opponent, args.rounds)
+        print(f"{name:<10} {result['wins'] / args.rounds:>7.1%} {result['ties'] / args.rounds:>7.1%} "
+              f"{result['losses'] / args.rounds:>7.1%} {result['ns_per_round']:>9.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Monte-Carlo simulator for Rock Paper Scissors strategies. Moves are the int codes
+of rock_paper_scissors (rock 0, paper 1, scissors 2) and every round of a chunk is
+resolved at once by indexing the game's 3x3 PAYOFF table with two NumPy arrays.
+
+A strategy is a callable strategy(rng, rounds) returning an int8 array of `rounds`
+moves. Scalar move functions such as get_computer_choice are wrapped with
+from_choice_function (slower: one Python call per round).
+
+Usage: python rps_simulation.py --player uniform --opponent biased --rounds 10000000
+"""
+
+import argparse
+import math
+import random
+import time
+import numpy as np
+from rock_paper_scissors import BIASED_WEIGHTS, MOVE_CODES, PAYOFF, get_computer_choice
+
+PAYOFF_TABLE = np.array(PAYOFF, dtype=np.int8)
+CHUNK_ROUNDS = 1 << 20  # rounds generated and resolved per NumPy batch
+Z_95 = 1.959964  # normal quantile for 95% confidence intervals
+
+def uniform(rng, rounds:int):
+    """
+    Every move with probability 1/3, like get_computer_choice but vectorized.
+    """
+    return rng.integers(0, 3, rounds, dtype=np.int8)
+
+def constant(move:str):
+    code = MOVE_CODES[move]
+
+    def strategy(rng, rounds):
+        return np.full(rounds, code, dtype=np.int8)
+    return strategy
+
+def biased(weights=BIASED_WEIGHTS):
+    """
+    Moves drawn with the given rock/paper/scissors probabilities.
+    """
+    cumulative = np.cumsum(weights) / sum(weights)
+
+    def strategy(rng, rounds):
+        return np.searchsorted(cumulative, rng.random(rounds), side='right').astype(np.int8)
+    return strategy
+
+def cycle():
+    """
+    rock, paper, scissors, rock... carried on across chunks.
+    """
+    played = 0
+
+    def strategy(rng, rounds):
+        nonlocal played
+        moves = ((np.arange(rounds) + played) % 3).astype(np.int8)
+        played += rounds
+        return moves
+    return strategy
+
+def from_choice_function(choose):
+    """
+    Strategy out of a function returning one move name per call, e.g. get_computer_choice.
+    """
+    def strategy(rng, rounds):
+        return np.fromiter((MOVE_CODES[choose()] for _ in range(rounds)), dtype=np.int8, count=rounds)
+    return strategy
+
+# name -> factory, so stateful strategies start fresh for every simulation
+STRATEGIES = {
+    'computer': lambda: from_choice_function(get_computer_choice),
+    'uniform': lambda: uniform,
+    'biased': biased,
+    'cycle': cycle,
+    'rock': lambda: constant('rock'),
+    'paper': lambda: constant('paper'),
+    'scissors': lambda: constant('scissors'),
+}
+
+def wilson_interval(successes:int, trials:int, z:float=Z_95)->tuple:
+    """
+    Wilson score interval for a binomial proportion (well behaved near 0 and 1).
+    """
+    if trials == 0:
+        return 0.0, 1.0
+    p = successes / trials
+    denominator = 1 + z * z / trials
+    centre = (p + z * z / (2 * trials)) / denominator
+    margin = z * math.sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials)) / denominator
+    return max(0.0, centre - margin), min(1.0, centre + margin)
+
+def simulate(player, opponent, rounds:int, seed=None, chunk:int=CHUNK_ROUNDS)->dict:
+    """
+    Play `rounds` rounds of player vs opponent and count the player's wins, ties and losses.
+    """
+    rng = np.random.default_rng(seed)
+    if seed is not None:
+        random.seed(seed)  # for scalar strategies built on the random module
+    counts = np.zeros(3, dtype=np.int64)  # losses, ties, wins
+    remaining = rounds
+    while remaining:
+        size = min(chunk, remaining)
+        outcomes = PAYOFF_TABLE[player(rng, size), opponent(rng, size)]
+        counts += np.bincount(outcomes + 1, minlength=3)
+        remaining -= size
+    losses, ties, wins = (int(count) for count in counts)
+    return {'rounds': rounds, 'wins': wins, 'ties': ties, 'losses': losses}
+
+def report(result:dict)->dict:
+    """
+    Win/tie/loss rates with their 95% confidence intervals.
+    """
+    rounds = result['rounds']
+    return {name: (result[name] / rounds if rounds else 0.0, wilson_interval(result[name], rounds))
+            for name in ('wins', 'ties', 'losses')}
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate Rock Paper Scissors strategies against each other.")
+    parser.add_argument('--player', choices=STRATEGIES, default='uniform')
+    parser.add_argument('--opponent', choices=STRATEGIES, default='computer')
+    parser.add_argument('--rounds', type=int, default=1_000_000)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    result = simulate(STRATEGIES[args.player](), STRATEGIES[args.opponent](), args.rounds, args.seed)
+    elapsed = time.perf_counter() - start
+    print(f"{args.player} vs {args.opponent}: {args.rounds:,} rounds in {elapsed:.2f}s "
+          f"({args.rounds / elapsed:,.0f} rounds/sec)")
+    for name, (rate, (low, high)) in report(result).items():
+        print(f"  {name:<6} {rate:7.3%}  95% CI [{low:.3%}, {high:.3%}]")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Round-robin tournament for Rock Paper Scissors bots: every pair of bots plays N
+rounds, rounds are resolved with the game's PAYOFF table (the rules behind
+determine_winner), and a leaderboard sorted by score is written to CSV.
+
+A bot is an object with choose() -> move name and observe(opponent_move), like the
+game's opponents. Plain move functions such as get_computer_choice are wrapped with
+ChoiceFunctionBot. Each pairing is cut into chunks of rounds that are spread over a
+process pool; a chunk starts with fresh bots, so learning bots relearn once per chunk.
+
+Usage: python rps_tournament.py --rounds 100000 --workers 8 -o rps_leaderboard.csv
+       python rps_tournament.py --scaling   (time the same tournament on 1, 2, 4... workers)
+"""
+
+import argparse
+import csv
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import combinations
+from rock_paper_scissors import MOVE_CODES, PAYOFF, SCRIPTED_BOTS, MarkovOpponent, get_computer_choice
+
+CHUNK_ROUNDS = 10_000  # rounds of one pairing played per pool task
+TASKS_PER_WORKER = 4  # tasks sent to a worker at once, to keep pickling overhead low
+
+class ChoiceFunctionBot:
+    """
+    Bot out of a function returning one move name per call, e.g. get_computer_choice.
+    """
+    def __init__(self, choose):
+        self.choose = choose
+
+    def observe(self, opponent_move):
+        pass
+
+# name -> bot factory. Factories are sent to worker processes, so they must pickle:
+# classes, module-level functions or functools.partial of those (no lambdas).
+BOTS = {
+    'random': partial(ChoiceFunctionBot, get_computer_choice),
+    'adaptive': MarkovOpponent,
+    'adaptive-order1': partial(MarkovOpponent, order=1),
+    **SCRIPTED_BOTS,
+}
+
+def play_chunk(task:tuple)->tuple:
+    """
+    Worker entry point: play one chunk of a pairing with fresh bots.
+    Returns (first name, second name, first's wins, ties, first's losses).
+    """
+    first_name, first_factory, second_name, second_factory, rounds, seed = task
+    if seed is not None:
+        random.seed(seed)
+    first, second = first_factory(), second_factory()
+    counts = [0, 0, 0]  # indexed by PAYOFF + 1: losses, ties, wins of the first bot
+    codes = MOVE_CODES
+    for _ in range(rounds):
+        first_move = first.choose()
+        second_move = second.choose()
+        counts[PAYOFF[codes[first_move]][codes[second_move]] + 1] += 1
+        first.observe(second_move)
+        second.observe(first_move)
+    losses, ties, wins = counts
+    return first_name, second_name, wins, ties, losses
+
+def make_tasks(bots:dict, rounds:int, chunk_rounds:int=CHUNK_ROUNDS, seed=None)->list:
+    """
+    Chunks of every pairing of `bots`, each with its own seed so results do not
+    depend on how many workers play them.
+    """
+    seeds = random.Random(seed)
+    tasks = []
+    for first, second in combinations(bots, 2):
+        for start in range(0, rounds, chunk_rounds):
+            chunk_seed = None if seed is None else seeds.getrandbits(64)
+            tasks.append((first, bots[first], second, bots[second], min(chunk_rounds, rounds - start), chunk_seed))
+    return tasks
+
+def run_tournament(bots:dict, rounds:int, workers:int=None, chunk_rounds:int=CHUNK_ROUNDS, seed=None)->dict:
+    """
+    Play every pairing of `bots` for `rounds` rounds. Returns bot name ->
+    {'matches', 'rounds', 'wins', 'ties', 'losses'}.
+    """
+    workers = workers or os.cpu_count() or 1
+    tasks = make_tasks(bots, rounds, chunk_rounds, seed)
+    totals = {name: {'matches': len(bots) - 1, 'rounds': 0, 'wins': 0, 'ties': 0, 'losses': 0} for name in bots}
+    if workers == 1:
+        results = map(play_chunk, tasks)
+        executor = None
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers)
+        results = executor.map(play_chunk, tasks, chunksize=max(1, len(tasks) // (workers * TASKS_PER_WORKER)))
+    try:
+        for first, second, wins, ties, losses in results:
+            for name, won, lost in ((first, wins, losses), (second, losses, wins)):
+                total = totals[name]
+                total['rounds'] += wins + ties + losses
+                total['wins'] += won
+                total['ties'] += ties
+                total['losses'] += lost
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return totals
+
+def leaderboard(totals:dict)->list:
+    """
+    Rows sorted by score (1 per win, 1/2 per tie, as a share of rounds played), best first.
+    """
+    rows = []
+    for name, total in totals.items():
+        score = (total['wins'] + total['ties'] / 2) / total['rounds'] if total['rounds'] else 0.0
+        rows.append({'bot': name, **total, 'score': score})
+    rows.sort(key=lambda row: (row['score'], row['wins']), reverse=True)
+    for rank, row in enumerate(rows, 1):
+        row['rank'] = rank
+    return rows
+
+def write_leaderboard_csv(rows:list, path:str='rps_leaderboard.csv'):
+    with open(path, 'w', newline='') as csvfile:
+        fieldnames = ['rank', 'bot', 'matches', 'rounds', 'wins', 'ties', 'losses', 'score']
+        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({**row, 'score': f"{row['score']:.4f}"})
+
+def main():
+    parser = argparse.ArgumentParser(description="Play every pair of Rock Paper Scissors bots and rank them.")
+    parser.add_argument('--bots', nargs='+', choices=BOTS, default=list(BOTS))
+    parser.add_argument('--rounds', type=int, default=100_000, help="rounds per pairing")
+    parser.add_argument('--chunk-rounds', type=int, default=CHUNK_ROUNDS, help="rounds per pool task")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: one per core)")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('-o', '--output', default='rps_leaderboard.csv')
+    parser.add_argument('--scaling', action='store_true', help="time the tournament on 1, 2, 4... workers")
+    args = parser.parse_args()
+    bots = {name: BOTS[name] for name in args.bots}
+    total_rounds = len(bots) * (len(bots) - 1) // 2 * args.rounds
+
+    if args.scaling:
+        cores = os.cpu_count() or 1
+        counts = sorted({1 << power for power in range(cores.bit_length()) if 1 << power <= cores} | {cores})
+        baseline = None
+        print(f"{'workers':>7} {'seconds':>8} {'rounds/sec':>12} {'speedup':>8}")
+        for workers in counts:
+            start = time.perf_counter()
+            run_tournament(bots, args.rounds, workers, args.chunk_rounds, args.seed)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            print(f"{workers:>7} {elapsed:>8.2f} {total_rounds / elapsed:>12,.0f} {baseline / elapsed:>7.2f}x")
+        return
+
+    start = time.perf_counter()
+    totals = run_tournament(bots, args.rounds, args.workers, args.chunk_rounds, args.seed)
+    elapsed = time.perf_counter() - start
+    rows = leaderboard(totals)
+    write_leaderboard_csv(rows, args.output)
+    print(f"{total_rounds:,} rounds in {elapsed:.2f}s ({total_rounds / elapsed:,.0f} rounds/sec)")
+    print(f"{'rank':>4} {'bot':<16} {'wins':>9} {'ties':>9} {'losses':>9} {'score':>7}")
+    for row in rows:
+        print(f"{row['rank']:>4} {row['bot']:<16} {row['wins']:>9} {row['ties']:>9} {row['losses']:>9} {row['score']:>7.1%}")
+    print(f"Leaderboard saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""
+Benchmark for NetworkScanner that runs fully offline against a fleet of fake hosts
+on the loopback network (127.0.0.0/8 is all local on Linux, one address per host).
+
+Every fake host has:
+  - open ports     listening and accepting, connection closed straight away
+  - closed ports   nothing listening, so the connect is refused
+  - filtered ports listening with a full accept backlog, so SYNs are dropped and
+                   the connect times out like a firewalled port
+  - stalled ports  accepted but never answered or closed (slow services)
+
+Each engine / concurrency combination is scanned in a fresh child process and we
+report hosts/sec, probes/sec (discovery and port probes), p50/p99 connect latency,
+peak RSS and wall time. Latencies are the scanner's own 'connect' timings, which
+start once a probe holds its concurrency slot, so queueing is not counted.
+
+Usage: python scan_benchmark.py --hosts 50 --engines threads async --concurrency 64 512
+       python scan_benchmark.py --open 80 --closed 81 --filtered 82 --stalled
+"""
+
+import argparse
+import ipaddress
+import multiprocessing
+import os
+import resource
+import selectors
+import socket
+import sys
+import threading
+import time
+from contextlib import redirect_stdout
+
+FLEET_SUBNET = '127.77.0.0/16'
+OPEN_PORTS = [22, 80, 443]
+CLOSED_PORTS = [21, 23, 25]
+FILTERED_PORTS = [3389]
+STALLED_PORTS = [8080]
+
+class Fleet:
+    """
+    Listening sockets for `hosts` fake hosts, served by one selector thread.
+    """
+    def __init__(self, hosts:int, open_ports=OPEN_PORTS, filtered_ports=FILTERED_PORTS,
+                 stalled_ports=STALLED_PORTS, subnet:str=FLEET_SUBNET):
+        network = ipaddress.ip_network(subnet)
+        self.addresses = [str(network[i + 1]) for i in range(hosts)]
+        self.open_ports = open_ports
+        self.filtered_ports = filtered_ports
+        self.stalled_ports = stalled_ports
+        self.sockets = []
+        self.stalled = []
+        self.selector = selectors.DefaultSelector()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.serve, daemon=True)
+
+    def listen(self, ip:str, port:int, backlog:int):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((ip, port))
+        sock.listen(backlog)
+        self.sockets.append(sock)
+        return sock
+
+    def start(self):
+        for ip in self.addresses:
+            for port in self.open_ports:
+                sock = self.listen(ip, port, 128)
+                sock.setblocking(False)
+                self.selector.register(sock, selectors.EVENT_READ, 'open')
+            for port in self.stalled_ports:
+                sock = self.listen(ip, port, 128)
+                sock.setblocking(False)
+                self.selector.register(sock, selectors.EVENT_READ, 'stall')
+            for port in self.filtered_ports:
+                # Never accepted: one connection of our own fills the backlog and
+                # the kernel drops every SYN after it.
+                self.listen(ip, port, 0)
+                filler = socket.create_connection((ip, port), timeout=1)
+                self.sockets.append(filler)
+        self.thread.start()
+        return self
+
+    def serve(self):
+        while not self.stopped.is_set():
+            for key, _ in self.selector.select(timeout=0.1):
+                try:
+                    conn, _ = key.fileobj.accept()
+                except OSError:
+                    continue
+                if key.data == 'open':
+                    conn.close()
+                else:
+                    self.stalled.append(conn)
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+        for sock in self.sockets + self.stalled:
+            sock.close()
+        self.selector.close()
+
+def percentile(values:list, fraction:float)->float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def run_trial(config:dict)->dict:
+    """
+    Child process: scan the fleet with one engine/concurrency setting and collect
+    the timing of every probe the scanner records in its metrics.
+    """
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import NetworkScanner as scanner
+
+    latencies = []  # every port connect attempt, retries included
+    discovery_probes = []  # every tcp discovery attempt
+    observe = scanner.metrics.observe
+
+    def record_probe(probe, outcome, seconds):
+        observe(probe, outcome, seconds)
+        if probe == 'connect':
+            latencies.append(seconds)
+        elif probe == 'tcp_discovery':
+            discovery_probes.append(seconds)
+
+    scanner.metrics.enabled = True  # record without start(): no sampler thread
+    scanner.metrics.observe = record_probe
+
+    results = {}
+    rtt = None if config['fixed_timeouts'] else scanner.RttTracker()
+    record = lambda ip, open_ports: results.__setitem__(ip, list(open_ports))
+    start = time.perf_counter()
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+        if config['engine'] == 'async':
+            scanner.run_async_scan(config['addresses'], config['ports'], config['concurrency'],
+                                   'tcp', config['per_host'], rtt, record)
+        else:
+            scanner.pipeline_scan(config['addresses'], config['ports'], 'tcp', config['per_host'],
+                                  config['concurrency'], rtt, record)
+    wall = time.perf_counter() - start
+
+    expected = sorted(config['expected_open'])
+    correct = len(results) == len(config['addresses']) and all(
+        sorted(ports) == expected for ports in results.values())
+    return {
+        'engine': config['engine'],
+        'concurrency': config['concurrency'],
+        'wall_sec': wall,
+        'hosts_per_sec': len(results) / wall,
+        'probes_per_sec': (len(latencies) + len(discovery_probes)) / wall,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'correct': correct,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark NetworkScanner against loopback fake hosts.")
+    parser.add_argument('--hosts', type=int, default=50, help="number of fake hosts")
+    parser.add_argument('--engines', nargs='+', choices=['threads', 'async'], default=['threads', 'async'])
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[64, 512],
+                        help="global probe limits to try")
+    parser.add_argument('--per-host', type=int, default=8)
+    parser.add_argument('--subnet', default=FLEET_SUBNET, help="fleet addresses, must be inside 127.0.0.0/8")
+    parser.add_argument('--open', type=int, nargs='*', default=OPEN_PORTS, help="accepting ports")
+    parser.add_argument('--closed', type=int, nargs='*', default=CLOSED_PORTS, help="refused ports")
+    parser.add_argument('--filtered', type=int, nargs='*', default=FILTERED_PORTS, help="ports that time out")
+    parser.add_argument('--stalled', type=int, nargs='*', default=STALLED_PORTS,
+                        help="ports that accept and never answer")
+    parser.add_argument('--fixed-timeouts', action='store_true',
+                        help="use the fixed CONNECT_TIMEOUT_SEC instead of RTT based timeouts")
+    args = parser.parse_args()
+    if not ipaddress.ip_network(args.subnet).subnet_of(ipaddress.ip_network('127.0.0.0/8')):
+        parser.error("--subnet must be a loopback range")
+
+    fleet = Fleet(args.hosts, args.open, args.filtered, args.stalled, args.subnet).start()
+    ports = sorted(set(args.open + args.closed + args.filtered + args.stalled))
+    print(f"Fleet: {args.hosts} hosts on {args.subnet}, {len(ports)} ports each "
+          f"(open {args.open}, closed {args.closed}, filtered {args.filtered}, stalled {args.stalled})")
+    header = f"{'engine':<8} {'conc':>6} {'wall s':>8} {'hosts/s':>9} {'probes/s':>9} " \
+             f"{'p50 ms':>8} {'p99 ms':>8} {'rss MB':>7}  ok"
+    print(header)
+    print('-' * len(header))
+    # A fresh interpreter per trial keeps peak RSS and warm caches from leaking between runs.
+    context = multiprocessing.get_context('spawn')
+    try:
+        for engine in args.engines:
+            for concurrency in args.concurrency:
+                config = {'engine': engine, 'concurrency': concurrency, 'per_host': args.per_host,
+                          'addresses': fleet.addresses, 'ports': ports,
+                          'expected_open': args.open + args.stalled,
+                          'fixed_timeouts': args.fixed_timeouts}
+                with context.Pool(1) as pool:
+                    row = pool.apply(run_trial, (config,))
+                print(f"{row['engine']:<8} {row['concurrency']:>6} {row['wall_sec']:>8.2f} "
+                      f"{row['hosts_per_sec']:>9.1f} {row['probes_per_sec']:>9.1f} {row['p50_ms']:>8.2f} "
+                      f"{row['p99_ms']:>8.2f} {row['peak_rss_mb']:>7.1f}  {'yes' if row['correct'] else 'NO'}")
+    finally:
+        fleet.stop()
+
+if __name__ == "__main__":
+    main()
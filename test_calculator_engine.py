@@ -0,0 +1,132 @@
+"""
+Tests for calculator_engine: the tokenizer/parser against Python's own arithmetic,
+and IncrementalEvaluator against evaluate() on the same expressions.
+
+Run: python -m unittest test_calculator_engine   (or python -m pytest)
+"""
+
+import unittest
+from calculator_engine import IncrementalEvaluator, evaluate, to_number, tokenize
+
+class EvaluateTest(unittest.TestCase):
+    def test_precedence(self):
+        self.assertEqual(evaluate("2+3×4"), 14)
+        self.assertEqual(evaluate("100-4×8÷2+0.25"), 84.25)
+        self.assertEqual(evaluate("12÷4+1"), 4.0)
+        # Left associative: 8-3-2 is (8-3)-2, 16÷4÷2 is (16÷4)÷2.
+        self.assertEqual(evaluate("8-3-2"), 3)
+        self.assertEqual(evaluate("16÷4÷2"), 2.0)
+
+    def test_unary_signs(self):
+        self.assertEqual(evaluate("-3+6×9"), 51)
+        self.assertEqual(evaluate("2×-3"), -6)
+        self.assertEqual(evaluate("--4"), 4)
+        self.assertEqual(evaluate("+5-+2"), 3)
+        self.assertEqual(evaluate("-(2+3)×2"), -10)
+
+    def test_parentheses(self):
+        self.assertEqual(evaluate("(2+3)×4"), 20)
+        self.assertEqual(evaluate("((1+2)×(3+4))"), 21)
+
+    def test_parentheses_errors(self):
+        for text in ["(1+2", "1+2)", ")(", "()", "2(3)", "(1+)"]:
+            with self.subTest(text=text), self.assertRaises(ValueError):
+                evaluate(text)
+
+    def test_malformed_input(self):
+        for text in ["", "1+", "×2", "1 2", "2**3", "1+a", "__import__('os')"]:
+            with self.subTest(text=text), self.assertRaises(ValueError):
+                evaluate(text)
+
+    def test_division_by_zero(self):
+        for text in ["1÷0", "5÷(2-2)", "1÷0.0"]:
+            with self.subTest(text=text), self.assertRaises(ZeroDivisionError):
+                evaluate(text)
+
+    def test_int_and_float_like_python(self):
+        self.assertIsInstance(evaluate("2×3"), int)
+        self.assertIsInstance(evaluate("6÷3"), float)
+        self.assertIsInstance(evaluate("1.5+1.5"), float)
+
+    def test_exponent_literals(self):
+        # Results the display shows in exponent form must parse back.
+        self.assertEqual(tokenize("2.5e-05×2"), [2.5e-05, '*', 2])
+        self.assertEqual(evaluate("1e+16+1"), 1e16 + 1)
+        self.assertEqual(evaluate("2.5e-05×4"), 2.5e-05 * 4)
+        self.assertEqual(evaluate("3E2÷3"), 100.0)
+
+    def test_carried_over_negative_result(self):
+        # After "=" a negative result stays on the display and the next operator follows it.
+        self.assertEqual(to_number("-5"), -5)
+        self.assertIsInstance(to_number("-5"), int)
+        self.assertEqual(to_number("-2.5e-05"), -2.5e-05)
+        result = str(evaluate("2-7"))
+        self.assertEqual(evaluate(result + "×3"), -15)
+        self.assertEqual(evaluate(result + "-1"), -6)
+
+class IncrementalEvaluatorTest(unittest.TestCase):
+    EXPRESSIONS = [
+        ["1", "+", "2"],
+        ["12", "÷", "4", "+", "1"],
+        ["3.5", "×", "2", "-", "7"],
+        ["100", "-", "4", "×", "8", "÷", "2", "+", "0.25"],
+        ["2", "+", "3", "×", "4", "×", "5", "-", "6", "÷", "3"],
+        ["-5", "×", "3", "+", "2"],
+        ["1e+16", "+", "1"],
+        ["2.5e-05", "÷", "5", "-", "1"],
+        ["7", "-", "2", "-", "9", "×", "0.5"],
+    ]
+
+    def entered(self, tokens):
+        """
+        Push the tokens the way the Calculator does and return the evaluator and the
+        number still being typed.
+        """
+        live = IncrementalEvaluator()
+        for number, op in zip(tokens[:-1:2], tokens[1::2]):
+            live.push(number, op)
+        return live, tokens[-1]
+
+    def test_preview_matches_evaluate(self):
+        for tokens in self.EXPRESSIONS:
+            with self.subTest(expression="".join(tokens)):
+                live, last = self.entered(tokens)
+                self.assertEqual(live.preview(last), evaluate("".join(tokens)))
+
+    def test_preview_of_every_prefix(self):
+        # The preview is shown after every key press, not only for the full expression.
+        tokens = self.EXPRESSIONS[4]
+        for end in range(1, len(tokens) + 1, 2):
+            with self.subTest(expression="".join(tokens[:end])):
+                live, last = self.entered(tokens[:end])
+                self.assertEqual(live.preview(last), evaluate("".join(tokens[:end])))
+
+    def test_preview_without_last_number(self):
+        # Nothing typed after the operator yet: the value of what came before it.
+        live, _ = self.entered(["2", "+", "3", "×", "4", "×", ""])
+        self.assertEqual(live.preview(""), evaluate("2+3×4"))
+
+    def test_division_by_zero(self):
+        live, last = self.entered(["1", "÷", "0"])
+        self.assertIsNone(live.preview(last))
+        # Once a completed part divided by zero, nothing after it can be evaluated.
+        live, last = self.entered(["1", "÷", "0", "+", "2"])
+        self.assertIsNone(live.preview(last))
+        with self.assertRaises(ZeroDivisionError):
+            evaluate("1÷0+2")
+
+    def test_replace_operator(self):
+        live = IncrementalEvaluator()
+        live.push("6", "+")
+        live.push("2", "×")
+        live.replace_operator("-")
+        self.assertEqual(live.preview("1"), evaluate("6+2-1"))
+
+    def test_reset(self):
+        live, _ = self.entered(["9", "×", "9"])
+        live.reset()
+        live.push("1", "+")
+        self.assertEqual(live.preview("1"), 2)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,172 @@
+"""
+Shared look for the Tk apps (Calculator, RPSGameGUI, DesktopPet): one colour
+palette, named widget styles, and a per-window registry that creates each font
+once and reuses it for every widget asking for the same family/size/weight.
+
+Usage:
+    theme = theme_for(root)
+    theme.button(frame, 'calc_digit', text="7", command=...)
+
+Run it directly to measure cold start of each app: python tk_theme.py
+"""
+
+import sys
+import time
+import tkinter as tk
+from tkinter import font as tkfont
+
+PALETTE = {
+    'background': "#222831",
+    'surface': "#393E46",
+    'text': "#EEEEEE",
+    'muted': "#AAAAAA",
+    'accent': "#00ADB5",
+    'highlight': "#FFD369",
+    'warning': "#F96D00",
+    'danger': "#FF2E63",
+    'white': "#FFFFFF",
+    'transparent': "#123456",  # colour keyed out of the DesktopPet window
+}
+CALC_FONT = "Segoe UI"
+RPS_FONT = "Arial"
+
+# Flat, borderless buttons as the Calculator draws them.
+FLAT_BUTTON = {'borderwidth': 0, 'highlightthickness': 0, 'relief': "flat", 'cursor': "hand2",
+               'highlightbackground': PALETTE['background']}
+
+# style name -> Tk options; 'font' is a (family, size, weight) tuple resolved through the registry.
+STYLES = {
+    'calc_display': {'bg': PALETTE['surface'], 'bd': 0, 'highlightthickness': 0},
+    'calc_pad': {'bg': PALETTE['background']},
+    'calc_total': {'bg': PALETTE['surface'], 'fg': PALETTE['muted'], 'anchor': tk.E, 'padx': 24,
+                   'font': (CALC_FONT, 16, "normal")},
+    'calc_current': {'bg': PALETTE['surface'], 'fg': PALETTE['white'], 'anchor': tk.E, 'padx': 24,
+                     'font': (CALC_FONT, 40, "bold")},
+    'calc_preview': {'bg': PALETTE['surface'], 'fg': PALETTE['accent'], 'anchor': tk.E, 'padx': 24,
+                     'font': (CALC_FONT, 14, "normal")},
+    'calc_digit': {**FLAT_BUTTON, 'bg': PALETTE['surface'], 'fg': PALETTE['text'],
+                   'activebackground': PALETTE['background'], 'activeforeground': PALETTE['accent'],
+                   'font': (CALC_FONT, 24, "bold")},
+    'calc_operator': {**FLAT_BUTTON, 'bg': PALETTE['accent'], 'fg': PALETTE['background'],
+                      'activebackground': PALETTE['surface'], 'activeforeground': PALETTE['white'],
+                      'font': (CALC_FONT, 24, "bold")},
+    'calc_clear': {**FLAT_BUTTON, 'bg': PALETTE['warning'], 'fg': PALETTE['white'],
+                   'activebackground': PALETTE['warning'], 'activeforeground': PALETTE['white'],
+                   'font': (CALC_FONT, 24, "bold")},
+    'calc_equals': {**FLAT_BUTTON, 'bg': PALETTE['accent'], 'fg': PALETTE['white'],
+                    'activebackground': PALETTE['accent'], 'activeforeground': PALETTE['background'],
+                    'font': (CALC_FONT, 24, "bold")},
+    'calc_exit': {**FLAT_BUTTON, 'bg': PALETTE['surface'], 'fg': PALETTE['warning'],
+                  'activebackground': PALETTE['background'], 'activeforeground': PALETTE['warning'],
+                  'font': (CALC_FONT, 24, "bold")},
+    'rps_panel': {'bg': PALETTE['background']},
+    'rps_heading': {'fg': PALETTE['text'], 'bg': PALETTE['background'], 'font': (RPS_FONT, 14, "bold")},
+    'rps_choice': {'width': 10, 'bg': PALETTE['accent'], 'fg': PALETTE['background'],
+                   'activebackground': PALETTE['highlight'], 'font': (RPS_FONT, 12, "bold")},
+    'rps_mode': {'fg': PALETTE['text'], 'bg': PALETTE['background'], 'selectcolor': PALETTE['surface'],
+                 'activebackground': PALETTE['background'], 'activeforeground': PALETTE['highlight'],
+                 'font': (RPS_FONT, 11, "normal")},
+    'rps_result': {'fg': PALETTE['highlight'], 'bg': PALETTE['background'], 'font': (RPS_FONT, 12, "normal")},
+    'rps_scoreboard': {'bg': PALETTE['surface'], 'fg': PALETTE['highlight'], 'justify': "left", 'bd': 2,
+                       'relief': "groove", 'padx': 10, 'pady': 5, 'font': (RPS_FONT, 12, "bold")},
+    'rps_quit': {'bg': PALETTE['danger'], 'fg': PALETTE['white'], 'activebackground': PALETTE['surface'],
+                 'font': (RPS_FONT, 11, "bold")},
+    'pet_sprite': {'bg': PALETTE['transparent'], 'bd': 0},
+}
+
+class Theme:
+    """
+    Fonts and resolved style options for one Tk root. Fonts are created on first
+    use and then shared, so 17 calculator buttons cost one Font object, not 17.
+    """
+    def __init__(self, root):
+        self.root = root
+        self.fonts = {}  # (family, size, weight) -> tkfont.Font
+        self.resolved = {}  # style name -> options with the font object filled in
+
+    def font(self, family:str, size:int, weight:str="normal")->tkfont.Font:
+        key = (family, size, weight)
+        font = self.fonts.get(key)
+        if font is None:
+            font = self.fonts[key] = tkfont.Font(root=self.root, family=family, size=size, weight=weight)
+        return font
+
+    def options(self, style:str, **overrides)->dict:
+        options = self.resolved.get(style)
+        if options is None:
+            options = dict(STYLES[style])
+            if 'font' in options:
+                options['font'] = self.font(*options['font'])
+            self.resolved[style] = options
+        return {**options, **overrides} if overrides else options
+
+    def button(self, parent, style:str, **options)->tk.Button:
+        return tk.Button(parent, **self.options(style, **options))
+
+    def label(self, parent, style:str, **options)->tk.Label:
+        return tk.Label(parent, **self.options(style, **options))
+
+    def radiobutton(self, parent, style:str, **options)->tk.Radiobutton:
+        return tk.Radiobutton(parent, **self.options(style, **options))
+
+    def frame(self, parent, style:str, **options)->tk.Frame:
+        return tk.Frame(parent, **self.options(style, **options))
+
+# One Theme per Tk interpreter, so every window of an app shares the same fonts.
+themes = {}
+
+def theme_for(widget)->Theme:
+    root = widget.winfo_toplevel()
+    theme = themes.get(root.tk)
+    if theme is None:
+        theme = themes[root.tk] = Theme(root)
+    return theme
+
+def count_tk_objects(root)->dict:
+    """
+    Widgets under `root`, fonts and images alive in its Tk interpreter.
+    """
+    widgets = 0
+    pending = [root]
+    while pending:
+        widget = pending.pop()
+        widgets += 1
+        pending.extend(widget.winfo_children())
+    return {'widgets': widgets, 'fonts': len(tkfont.names(root)), 'images': len(root.image_names())}
+
+def measure_startup(create_app, repeat:int=5)->dict:
+    """
+    Time from creating the Tk root to the first frame drawn (the window mapped and
+    every pending redraw done), averaged over `repeat` cold starts, plus the Tk
+    object counts of the last one.
+    """
+    total = 0.0
+    counts = {}
+    for _ in range(repeat):
+        start = time.perf_counter()
+        root = tk.Tk()
+        create_app(root)
+        root.update()  # maps the window and runs the first redraw
+        total += time.perf_counter() - start
+        counts = count_tk_objects(root)
+        themes.pop(root.tk, None)
+        root.destroy()
+    return {'first_frame_ms': total / repeat * 1000, **counts}
+
+if __name__ == "__main__":
+    from Calculator import Calculator
+    from rock_paper_scissors import RPSGameGUI
+    apps = {'Calculator': Calculator, 'RPSGameGUI': RPSGameGUI}
+    try:
+        from DesktopPet import DesktopPet
+        apps['DesktopPet'] = DesktopPet
+    except ImportError as e:
+        print(f"Skipping DesktopPet: {e}")
+    print(f"{'app':<12} {'first frame ms':>15} {'widgets':>8} {'fonts':>6} {'images':>7}")
+    for name, app in apps.items():
+        try:
+            result = measure_startup(app)
+        except tk.TclError as e:
+            sys.exit(f"Cannot open a Tk window here: {e}")
+        print(f"{name:<12} {result['first_frame_ms']:>15.1f} {result['widgets']:>8} "
+              f"{result['fonts']:>6} {result['images']:>7}")